@@ -0,0 +1,221 @@
+import os
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional
+from dotenv import load_dotenv
+from pymongo import ASCENDING, UpdateOne
+import mongo
+
+# Load environment variables
+load_dotenv()
+ANALYTICS_ENABLED = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+# Counter increments are merged in memory and written in one bulk_write this often, off the response path
+ANALYTICS_FLUSH_INTERVAL_SECONDS = float(os.getenv("ANALYTICS_FLUSH_INTERVAL_SECONDS", "2"))
+
+# Rollup documents: one per (UTC day, dimension, value), where dimension is "all", "tech" or "role".
+# Dashboards read a bounded number of these instead of scanning candidates and their chat_history.
+ROLLUP_COLLECTION = "analytics_rollups"
+DIMENSIONS = ("all", "tech", "role")
+EVALUATION_LABELS = ("relevant", "irrelevant", "gibberish")
+COUNTERS = ("interviews", "turns", "fallbacks") + EVALUATION_LABELS
+ROLLUP_INDEXES = [
+    ([("dimension", ASCENDING), ("day", ASCENDING)], {"name": "dimension_day"}),
+]
+
+# rollup _id -> ({"day", "dimension", "value"}, {counter: increment}) waiting for the next flush
+_pending = {}
+_pending_lock = threading.Lock()
+_stopping = threading.Event()
+_worker = None
+
+
+def _day(when: datetime = None) -> str:
+    return (when or datetime.utcnow()).strftime("%Y-%m-%d")
+
+
+def _keys(day: str, tech_stack: List[str], interested_roles: List[str]) -> List[tuple]:
+    keys = [(day, "all", "all")]
+    keys += [(day, "tech", tech) for tech in dict.fromkeys(tech_stack or [])]
+    keys += [(day, "role", role) for role in dict.fromkeys(interested_roles or [])]
+    return keys
+
+
+def _write(increments: dict) -> None:
+    """$inc every pending rollup in one unordered bulk_write."""
+    if not increments:
+        return
+    operations = [
+        UpdateOne({"_id": rollup_id}, {"$inc": counters, "$setOnInsert": fields}, upsert=True)
+        for rollup_id, (fields, counters) in increments.items()
+    ]
+    try:
+        mongo.collection(ROLLUP_COLLECTION).bulk_write(operations, ordered=False)
+    except Exception as e:
+        # Analytics must never fail an interview turn - lost increments are repaired by a backfill
+        print(f"⚠️ Analytics rollup update failed: {e}")
+
+
+def _increment(profile: dict, counters: dict) -> None:
+    """$inc the counters on every rollup the candidate's stack and roles fall into.
+
+    With the flusher running (the API) this only merges into the in-memory batch; otherwise it writes right away.
+    """
+    if not ANALYTICS_ENABLED:
+        return
+    increments = {}
+    for day, dimension, value in _keys(_day(), profile.get("tech_stack", []), profile.get("interested_roles", [])):
+        increments[f"{day}|{dimension}|{value}"] = ({"day": day, "dimension": dimension, "value": value}, dict(counters))
+    if _worker is None:
+        _write(increments)
+        return
+    with _pending_lock:
+        for rollup_id, (fields, added) in increments.items():
+            pending = _pending.setdefault(rollup_id, (fields, {}))[1]
+            for counter, amount in added.items():
+                pending[counter] = pending.get(counter, 0) + amount
+
+
+def flush() -> None:
+    """Write the merged increments now."""
+    global _pending
+    with _pending_lock:
+        increments, _pending = _pending, {}
+    _write(increments)
+
+
+def _run() -> None:
+    while not _stopping.wait(ANALYTICS_FLUSH_INTERVAL_SECONDS):
+        flush()
+
+
+def start() -> None:
+    """Batch rollup updates in a background thread (called from the API lifespan)."""
+    global _worker
+    if ANALYTICS_ENABLED and _worker is None:
+        _stopping.clear()
+        _worker = threading.Thread(target=_run, name="analytics-flusher", daemon=True)
+        _worker.start()
+
+
+def stop() -> None:
+    """Stop the flusher and write whatever is still pending - called on shutdown."""
+    global _worker
+    if _worker is not None:
+        _stopping.set()
+        _worker.join(timeout=10)
+        _worker = None
+    flush()
+
+
+def record_interview_started(profile: dict) -> None:
+    _increment(profile, {"interviews": 1})
+
+
+def record_turn(profile: dict, evaluation: Optional[str]) -> None:
+    """One candidate message; evaluation is None for turns the evaluator didn't see (greeting phase)."""
+    counters = {"turns": 1}
+    if evaluation in EVALUATION_LABELS:
+        counters[evaluation] = 1
+        if evaluation != "relevant":
+            counters["fallbacks"] = 1
+    _increment(profile, counters)
+
+
+def _rates(doc: dict) -> dict:
+    counts = {counter: doc.get(counter, 0) for counter in COUNTERS}
+    evaluated = sum(counts[label] for label in EVALUATION_LABELS)
+    return {
+        **counts,
+        "average_turns": round(counts["turns"] / counts["interviews"], 2) if counts["interviews"] else None,
+        "fallback_rate": round(counts["fallbacks"] / evaluated, 3) if evaluated else None,
+        **{f"{label}_ratio": round(counts[label] / evaluated, 3) if evaluated else None for label in EVALUATION_LABELS},
+    }
+
+
+def dashboard(dimension: str = "all", days: int = 30) -> dict:
+    """Per-day and per-value rollups for the last N days - cost depends on days and values, not on candidates."""
+    if dimension not in DIMENSIONS:
+        raise ValueError(f"Unknown dimension '{dimension}', expected one of {', '.join(DIMENSIONS)}.")
+    since = _day(datetime.utcnow() - timedelta(days=days - 1))
+    docs = list(mongo.collection(ROLLUP_COLLECTION).find({"dimension": dimension, "day": {"$gte": since}}).sort("day", ASCENDING))
+
+    totals = {}
+    for doc in docs:
+        total = totals.setdefault(doc["value"], {counter: 0 for counter in COUNTERS})
+        for counter in COUNTERS:
+            total[counter] += doc.get(counter, 0)
+    return {
+        "dimension": dimension,
+        "since": since,
+        "daily": [{"day": doc["day"], "value": doc["value"], **_rates(doc)} for doc in docs],
+        "totals": {value: _rates(total) for value, total in totals.items()},
+    }
+
+
+def _backfill_pipeline(dimension: str) -> list:
+    """Recompute one dimension's rollups from candidates.chat_history entirely inside MongoDB."""
+    pipeline = [{"$match": {"chat_history.0": {"$exists": True}}}]
+    if dimension == "tech":
+        pipeline.append({"$unwind": "$tech_stack"})
+        value = "$tech_stack"
+    elif dimension == "role":
+        pipeline.append({"$unwind": "$interested_roles"})
+        value = "$interested_roles"
+    else:
+        value = {"$literal": "all"}
+    pipeline += [
+        {"$unwind": "$chat_history"},
+        {"$match": {"chat_history.timestamp": {"$type": "date"}}},
+        {"$project": {
+            "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$chat_history.timestamp"}},
+            "value": value,
+            "started": {"$cond": [{"$eq": ["$chat_history.user", "START_INTERVIEW"]}, 1, 0]},
+            "evaluation": "$chat_history.evaluation",
+        }},
+        {"$group": {
+            "_id": {"day": "$day", "value": "$value"},
+            "interviews": {"$sum": "$started"},
+            "turns": {"$sum": {"$subtract": [1, "$started"]}},
+            "fallbacks": {"$sum": {"$cond": [{"$in": ["$evaluation", ["irrelevant", "gibberish"]]}, 1, 0]}},
+            **{label: {"$sum": {"$cond": [{"$eq": ["$evaluation", label]}, 1, 0]}} for label in EVALUATION_LABELS},
+        }},
+        {"$project": {
+            "_id": {"$concat": ["$_id.day", f"|{dimension}|", "$_id.value"]},
+            "day": "$_id.day",
+            "dimension": {"$literal": dimension},
+            "value": "$_id.value",
+            **{counter: 1 for counter in COUNTERS},
+        }},
+        # Never lower a counter: ended interviews are deleted and idle ones archived, so the transcripts still in
+        # candidates can undercount a day that the incremental updates counted correctly
+        {"$merge": {
+            "into": ROLLUP_COLLECTION,
+            "on": "_id",
+            "whenMatched": [{"$set": {counter: {"$max": [{"$ifNull": [f"${counter}", 0]}, f"$$new.{counter}"]} for counter in COUNTERS}}],
+            "whenNotMatched": "insert",
+        }},
+    ]
+    return pipeline
+
+
+def backfill(candidates_collection, dimensions: List[str] = None) -> None:
+    """Fill rollups from the transcripts still in candidates - run once after deploying, or after lost increments.
+
+    Counters are only ever raised (to the transcript count), never lowered: interviews that were ended (deleted) or
+    archived are not in candidates any more, so their turns can't be recounted and the existing rollup is kept.
+    Transcript entries written before evaluations were recorded count as turns with no verdict.
+    """
+    for keys, options in ROLLUP_INDEXES:
+        mongo.collection(ROLLUP_COLLECTION).create_index(keys, **options)
+    for dimension in dimensions or DIMENSIONS:
+        print(f"📊 Backfilling '{dimension}' rollups")
+        candidates_collection.aggregate(_backfill_pipeline(dimension), allowDiskUse=True)
+    print(f"📊 Backfill finished")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild recruiter analytics rollups from candidate transcripts.")
+    parser.add_argument("--dimensions", nargs="*", choices=DIMENSIONS, help="Only rebuild these dimensions")
+    args = parser.parse_args()
+    backfill(mongo.collection("candidates"), args.dimensions)
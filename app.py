@@ -1,10 +1,16 @@
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import openai
 from dotenv import load_dotenv
 import os
 import base64
+import ast
+import hashlib
 from pathlib import Path
+from tech_extraction import extract_local, canonicalize
+from chat_render import build_window_html, CHAT_WINDOW_SIZE
 
 # Configuration
 BASE_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
@@ -14,6 +20,30 @@ if os.getenv("PORT"):  # Cloud environment
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# Backend GET cache - shared by all sessions, keyed per candidate
+API_CACHE_TTL_SECONDS = int(os.getenv("API_CACHE_TTL_SECONDS", "300"))
+API_CACHE_MAX_ENTRIES = int(os.getenv("API_CACHE_MAX_ENTRIES", "1000"))
+
+# Images under static/ are served by Streamlit static serving (enableStaticServing in .streamlit/config.toml)
+STATIC_DIR = Path(__file__).parent / "static"
+
+# Pooled backend HTTP client
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_GET_RETRIES = int(os.getenv("HTTP_GET_RETRIES", "2"))
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+# Read timeout per endpoint (first path segment) - only the LLM-backed endpoints need the long one
+ENDPOINT_READ_TIMEOUTS = {
+    "login": 10,
+    "register": 10,
+    "tech_stack": 10,
+    "history": 15,
+    "update_full_details": 10,
+    "start_interview": 60,
+    "chat": 60,
+    "end_interview": 15,
+}
+DEFAULT_READ_TIMEOUT = 30
+
 # Initialize session state
 def initialize_session_state():
     """Initialize all session state variables with default values."""
@@ -29,6 +59,7 @@ def initialize_session_state():
         "interview_started": False,
         "input_counter": 0,
         "history_loaded": False,
+        "chat_window": CHAT_WINDOW_SIZE,
         "is_returning_user": False
     }
     
@@ -208,17 +239,41 @@ def load_common_styles():
     """, unsafe_allow_html=True)
 
 # API helper functions
+@st.cache_resource
+def get_http_session():
+    """Process-wide keep-alive session shared by every Streamlit session and rerun."""
+    session = requests.Session()
+    # Idempotent GETs are retried on connection errors and gateway errors; POSTs only when the connection never opened
+    retry = Retry(
+        total=HTTP_GET_RETRIES,
+        connect=HTTP_GET_RETRIES,
+        read=HTTP_GET_RETRIES,
+        status=HTTP_GET_RETRIES,
+        backoff_factor=0.3,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=frozenset({"GET"}),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def get_timeout(endpoint):
+    """(connection_timeout, read_timeout) for an endpoint."""
+    return (CONNECT_TIMEOUT, ENDPOINT_READ_TIMEOUTS.get(endpoint.split("/")[0], DEFAULT_READ_TIMEOUT))
+
 def make_api_request(endpoint, method="GET", json_data=None):
     """Make API request with error handling."""
     try:
         url = f"{BASE_URL}/{endpoint}"
         print(f"🔗 Making {method} request to: {url}")
         
-        # Increased timeout for LLM operations and added connection timeout
+        session = get_http_session()
         if method == "GET":
-            response = requests.get(url, timeout=(5, 60))  # (connection_timeout, read_timeout)
+            response = session.get(url, timeout=get_timeout(endpoint))
         else:
-            response = requests.post(url, json=json_data, timeout=(5, 60))
+            response = session.post(url, json=json_data, timeout=get_timeout(endpoint))
         
         print(f"📊 Response status: {response.status_code}")
         
@@ -241,6 +296,36 @@ def make_api_request(endpoint, method="GET", json_data=None):
         print(f"❌ Request Exception: {error_msg}")
         return None, error_msg
 
+class BackendError(Exception):
+    """Raised inside cached fetches so failed responses are never cached."""
+
+@st.cache_resource
+def get_cache_generations():
+    """Process-wide generation counter per candidate; bumping it invalidates that candidate's cached GETs."""
+    return {}
+
+@st.cache_data(ttl=API_CACHE_TTL_SECONDS, max_entries=API_CACHE_MAX_ENTRIES, show_spinner=False)
+def _cached_get(endpoint, candidate_id, generation):
+    """Backend GET cached per (endpoint, candidate, generation)."""
+    data, error = make_api_request(endpoint)
+    if error:
+        raise BackendError(error)
+    return data
+
+def cached_api_get(endpoint, candidate_id):
+    """GET a candidate-scoped endpoint through the cache, returning (data, error) like make_api_request."""
+    generation = get_cache_generations().get(candidate_id, 0)
+    try:
+        return _cached_get(endpoint, candidate_id, generation), None
+    except BackendError as e:
+        return None, str(e)
+
+def invalidate_candidate_cache(candidate_id):
+    """Drop every cached GET for the candidate - call after any request that mutates their data."""
+    if candidate_id:
+        generations = get_cache_generations()
+        generations[candidate_id] = generations.get(candidate_id, 0) + 1
+
 def add_to_chat_history(user_message=None, bot_message=None):
     """Add messages to chat history."""
     if user_message:
@@ -248,46 +333,86 @@ def add_to_chat_history(user_message=None, bot_message=None):
     if bot_message:
         st.session_state.chat_history.append(("Rick", bot_message))
 
-# Technology extraction function
-def extract_technologies(text):
-    """Extract technologies from text using OpenAI."""
-    if not text.strip():
-        return []
+def load_history_into_session(db_history):
+    """Replace the session's chat history with transcript entries from the backend."""
+    st.session_state.chat_history = []
+    
+    for entry in db_history:
+        if entry['user'] != "START_INTERVIEW":
+            st.session_state.chat_history.append(("You", entry['user']))
+        st.session_state.chat_history.append(("Rick", entry['bot']))
     
+    if db_history:
+        st.session_state.interview_started = True
+        st.session_state.is_returning_user = len(db_history) > 1
+    else:
+        st.session_state.is_returning_user = False
+    st.session_state.history_loaded = True
+
+# Technology extraction functions
+@st.cache_data(show_spinner=False, max_entries=1024)
+def extract_unmatched_technologies(tokens):
+    """Ask OpenAI which of the tokens the alias dictionary didn't recognise are technologies (memoized per token set)."""
     prompt = f"""
-    Extract a list of technologies, tools, and frameworks from the following input. Only return a clean Python list. No explanation, no extra text.
+    From the following words, return only those that are technologies, tools, or frameworks. Only return a clean Python list. No explanation, no extra text.
 
-    Input: "{text}"
+    Words: {", ".join(tokens)}
 
-    Output (as a Python list, convert all tech names to standardized full names in title case):
+    Output (as a Python list, convert all tech names to standardized full names in title case, or [] if none):
     """
 
-    try:
-        response = openai.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
-        )
-        answer = response.choices[0].message.content
-        tech_list = eval(answer.strip()) if answer.strip().startswith("[") else []
-        return sorted(set(tech_list))
-    except Exception as e:
-        st.error(f"Error extracting technologies: {e}")
+    response = openai.chat.completions.create(
+        model="gpt-4",
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0,
+        max_tokens=100,
+    )
+    answer = response.choices[0].message.content.strip()
+    # literal_eval only accepts literals - never run model output as code
+    parsed = ast.literal_eval(answer) if answer.startswith("[") else []
+    return canonicalize([name for name in parsed if isinstance(name, str)])
+
+def extract_technologies(text):
+    """Extract technologies from text - local alias matching first, OpenAI only for words it doesn't know."""
+    if not text.strip():
         return []
 
+    found, unmatched = extract_local(text)
+    tech_list = list(found)
+    if unmatched:
+        try:
+            tech_list += extract_unmatched_technologies(unmatched)
+        except Exception as e:
+            st.error(f"Error extracting technologies: {e}")
+    return sorted(set(tech_list))
+
+# Static asset helpers
+@st.cache_resource
+def static_url(filename):
+    """URL of a file in static/, versioned by content hash so browsers can cache it long-term; None if the file is missing (callers skip the tag)."""
+    path = STATIC_DIR / filename
+    if not path.exists():
+        return None
+    digest = hashlib.md5(path.read_bytes()).hexdigest()[:10]
+    return f"app/static/{filename}?v={digest}"
+
+@st.cache_resource
+def load_audio_data_uri(audio_file_path):
+    """Base64-encode an audio file once per process (static serving doesn't serve audio content types)."""
+    audio_path = Path(audio_file_path)
+    if not audio_path.exists():
+        return None
+    return f"data:audio/mpeg;base64,{base64.b64encode(audio_path.read_bytes()).decode()}"
+
 # Audio helper function
 def play_audio(audio_file_path):
     """Play audio using HTML5 audio element with base64 encoding for local files."""
     try:
-        # Read the audio file and encode to base64
-        audio_path = Path(audio_file_path)
-        if audio_path.exists():
-            audio_bytes = audio_path.read_bytes()
-            audio_base64 = base64.b64encode(audio_bytes).decode()
-            
+        audio_src = load_audio_data_uri(audio_file_path)
+        if audio_src:
             audio_html = f"""
             <audio autoplay style="display: none;">
-                <source src="data:audio/mpeg;base64,{audio_base64}" type="audio/mpeg">
+                <source src="{audio_src}" type="audio/mpeg">
                 Your browser does not support the audio element.
             </audio>
             <script>
@@ -310,18 +435,14 @@ def play_audio(audio_file_path):
 # Header component
 def render_header():
     """Render common header with logo."""
-    try:
-        logo_path = Path("techrickal.png")
-        if logo_path.exists():
-            encoded_logo = base64.b64encode(logo_path.read_bytes()).decode()
-            st.markdown(f"""
-            <div class='logo-header'>
-                <span class="welcome-text">Welcome to </span><span class="brand-text">TechRickal Interviews  <img src="data:image/png;base64,{encoded_logo}" alt="TechRicka Logo"></span>
-            </div>
-            """, unsafe_allow_html=True)
-        else:
-            st.markdown("<div class='logo-header'>🤖 TechRickal Interviews</div>", unsafe_allow_html=True)
-    except Exception:
+    logo_url = static_url("techrickal.png")
+    if logo_url:
+        st.markdown(f"""
+        <div class='logo-header'>
+            <span class="welcome-text">Welcome to </span><span class="brand-text">TechRickal Interviews  <img src="{logo_url}" alt="TechRicka Logo"></span>
+        </div>
+        """, unsafe_allow_html=True)
+    else:
         st.markdown("<div class='logo-header'>🤖 TechRickal Interviews</div>", unsafe_allow_html=True)
 
 def login_page():
@@ -349,10 +470,12 @@ def login_page():
         text-shadow: 2px 2px 4px #000;
     }
     </style>
+    """, unsafe_allow_html=True)
 
-    <div class="logo-container">
-        <img src="https://static.wikia.nocookie.net/rickandmorty/images/d/df/Robot_Rick.png" alt="Rick Logo">
-    </div>
+    rick_logo_url = static_url("Robot_Rick.png")
+    logo_html = f'<div class="logo-container"><img src="{rick_logo_url}" alt="Rick Logo"></div>' if rick_logo_url else ""
+    st.markdown(f"""
+    {logo_html}
 
     <div class="title">🤖 Interview Chatbot</div>
     """, unsafe_allow_html=True)
@@ -375,8 +498,8 @@ def login_page():
         time.sleep(1.2)
             
         with st.spinner("Authenticating..."):
-            # Try login first
-            login_data, login_error = make_api_request("login", "POST", {
+            # Try login first - bootstrap returns profile, tech stack and recent history in one round trip
+            login_data, login_error = make_api_request("bootstrap", "POST", {
                 "name": name, "email": email, "password": password
             })
             
@@ -386,8 +509,12 @@ def login_page():
                 st.session_state.candidate_email = login_data["email"]
                 
                 # Check if tech stack exists
-                stack_data, _ = make_api_request(f"tech_stack/{login_data['candidate_id']}")
-                if stack_data and stack_data.get("tech_stack"):
+                if login_data.get("tech_stack"):
+                    if login_data.get("has_more"):
+                        # Only the latest slice came back - the chat page fetches the full transcript from /history
+                        st.session_state.history_loaded = False
+                    else:
+                        load_history_into_session(login_data["chat_history"])
                     st.session_state.page = "chat"
                 else:
                     st.session_state.page = "tech_stack"
@@ -494,34 +621,22 @@ def confirm_stack_page():
             }
             
             data, error = make_api_request(f"update_full_details/{st.session_state.candidate_id}", "POST", payload)
+            invalidate_candidate_cache(st.session_state.candidate_id)
             if data:
                 st.session_state.page = "chat"
                 st.rerun()
             else:
                 st.error(f"Failed to save details: {error}")
 
-def render_chat_message(sender, message):
-    """Render a single chat message."""
-    if sender == "You":
-        st.markdown(f"""
-        <div class="message-container user-message">
-            <div class="message-sender user-sender">
-                <img src="https://raw.githubusercontent.com/PrakharPandey2729/interview-chatbot/main/morty.png" alt="User" class="morty-icon">
-                You
-            </div>
-            <div class="message-bubble user-bubble">{message}</div>
-        </div>
-        """, unsafe_allow_html=True)
-    else:
-        st.markdown(f"""
-        <div class="message-container rick-message">
-            <div class="message-sender rick-sender">
-                <img src="https://raw.githubusercontent.com/PrakharPandey2729/interview-chatbot/main/Robot_Rick.png" alt="Rick" class="rick-icon">
-                Rick
-            </div>
-            <div class="message-bubble rick-bubble">{message}</div>
-        </div>
-        """, unsafe_allow_html=True)
+def render_chat_history():
+    """Render the most recent window of the chat as one element, with a control to reveal older messages."""
+    avatars = {"You": static_url("morty.png"), "Rick": static_url("Robot_Rick.png")}
+    html, hidden = build_window_html(st.session_state.chat_history, st.session_state.chat_window, avatars)
+    if hidden:
+        if st.button(f"⬆️ Load older messages ({hidden} hidden)", key="load_older_btn"):
+            st.session_state.chat_window += CHAT_WINDOW_SIZE
+            st.rerun()
+    st.markdown(html, unsafe_allow_html=True)
 
 def chat_page():
     """Main chat interface."""
@@ -664,21 +779,9 @@ def chat_page():
     
     # Load existing chat history if not already loaded
     if not st.session_state.history_loaded:
-        data, error = make_api_request(f"history/{st.session_state.candidate_id}")
+        data, error = cached_api_get(f"history/{st.session_state.candidate_id}", st.session_state.candidate_id)
         if data:
-            db_history = data["chat_history"]
-            st.session_state.chat_history = []
-            
-            for entry in db_history:
-                if entry['user'] != "START_INTERVIEW":
-                    st.session_state.chat_history.append(("You", entry['user']))
-                st.session_state.chat_history.append(("Rick", entry['bot']))
-            
-            if db_history:
-                st.session_state.interview_started = True
-                st.session_state.is_returning_user = len(db_history) > 1
-            else:
-                st.session_state.is_returning_user = False
+            load_history_into_session(data["chat_history"])
         
         st.session_state.history_loaded = True
     
@@ -726,6 +829,7 @@ def chat_page():
                 time.sleep(1)
                 
                 data, error = make_api_request(f"start_interview/{st.session_state.candidate_id}", "POST")
+                invalidate_candidate_cache(st.session_state.candidate_id)
                 if data:
                     add_to_chat_history(bot_message=data["response"])
                     st.session_state.interview_started = True
@@ -736,8 +840,7 @@ def chat_page():
     
     # Display chat history
     st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-    for sender, message in st.session_state.chat_history:
-        render_chat_message(sender, message)
+    render_chat_history()
     st.markdown('</div>', unsafe_allow_html=True)
 
     # Chat input
@@ -757,6 +860,7 @@ def chat_page():
     # Handle message sending
     if send_clicked and user_message.strip():
         data, error = make_api_request(f"chat/{st.session_state.candidate_id}", "POST", {"message": user_message})
+        invalidate_candidate_cache(st.session_state.candidate_id)
         if data:
             add_to_chat_history(user_message, data["response"])
             if data.get("interview_started"):
@@ -792,6 +896,7 @@ def chat_page():
             
             if st.button("🛑 End Interview", use_container_width=True, type="primary"):
                 data, error = make_api_request(f"end_interview/{st.session_state.candidate_id}", "POST")
+                invalidate_candidate_cache(st.session_state.candidate_id)
                 if data:
                     # Clear all session state to completely reset the app
                     st.session_state.clear()
@@ -0,0 +1,151 @@
+import os
+import zlib
+import argparse
+from datetime import datetime, timedelta
+from typing import List, Optional
+import bson
+from bson import Binary, ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+from rick_agent import interview_service, init_agent
+from transcript_writer import transcript_writer
+from profile_cache import profile_cache
+import interview_plan
+import mongo
+
+try:
+    import zstandard
+except ImportError:  # fall back to zlib - the codec is recorded per archive document
+    zstandard = None
+
+# Load environment variables
+load_dotenv()
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "30"))
+ARCHIVE_ZSTD_LEVEL = int(os.getenv("ARCHIVE_ZSTD_LEVEL", "10"))
+ARCHIVE_COLLECTION = "interview_archive"
+
+# One document per archived interview: identifying fields in the clear, everything else in one compressed
+# BSON blob ({"candidate": <candidate document incl. chat_history>, "graph_state": <final LangGraph values>}).
+ARCHIVE_INDEXES = [
+    ([("email", ASCENDING)], {"name": "archive_email"}),
+]
+
+
+def _compress(data: bytes) -> tuple:
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ARCHIVE_ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, 9)
+
+
+def _decompress(codec: str, blob: bytes) -> bytes:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This interview was archived with zstd - install the zstandard package to rehydrate it.")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return zlib.decompress(blob)
+
+
+def archive_candidate(candidates_collection, candidate_id: str) -> bool:
+    """Move one interview (candidate document + final graph state) into the archive; False if there was nothing to move.
+
+    The archive document is written before anything is deleted, so an interrupted run leaves a duplicate, never a loss.
+    Queued transcript entries are written first, and the candidate's cached profile and pending plan refill are dropped.
+    """
+    obj_id = ObjectId(candidate_id)
+    # Raises if queued entries can't be written - better not to archive than to archive a transcript missing them
+    transcript_writer.flush_candidate(candidate_id)
+    candidate = candidates_collection.find_one({"_id": obj_id})
+    if candidate is None:
+        return False
+    raw = bson.encode({"candidate": candidate, "graph_state": interview_service.get_state_values(candidate_id)})
+    codec, blob = _compress(raw)
+    mongo.collection(ARCHIVE_COLLECTION).replace_one({"_id": obj_id}, {
+        "_id": obj_id,
+        "email": candidate.get("email"),
+        "name": candidate.get("name"),
+        "archived_at": datetime.utcnow(),
+        "codec": codec,
+        "raw_size": len(raw),
+        "blob": Binary(blob),
+    }, upsert=True)
+    candidates_collection.delete_one({"_id": obj_id})
+    interview_service.delete_state(candidate_id)
+    transcript_writer.discard(candidate_id)
+    profile_cache.invalidate(candidate_id)
+    interview_plan.discard(candidate_id)
+    return True
+
+
+def credentials_match(candidate: dict, name: str, password: str) -> bool:
+    return candidate.get("password") == password and candidate.get("name", "").strip().lower() == name.strip().lower()
+
+
+def rehydrate(candidates_collection, candidate_id: str = None, email: str = None, name: str = None, password: str = None) -> Optional[dict]:
+    """Restore an archived interview into the hot collections (by id or email); returns the candidate or None.
+
+    With a password (the login path), the archived candidate's name and password are checked before anything is moved.
+    """
+    query = {"_id": ObjectId(candidate_id)} if candidate_id else {"email": email}
+    archived = mongo.collection(ARCHIVE_COLLECTION).find_one(query)
+    if archived is None:
+        return None
+    record = bson.decode(_decompress(archived["codec"], archived["blob"]))
+    candidate = record["candidate"]
+    if password is not None and not credentials_match(candidate, name or "", password):
+        return None
+    candidates_collection.replace_one({"_id": candidate["_id"]}, candidate, upsert=True)
+    if record.get("graph_state"):
+        interview_service.restore_state(str(candidate["_id"]), record["graph_state"])
+    mongo.collection(ARCHIVE_COLLECTION).delete_one({"_id": archived["_id"]})
+    print(f"🧊 Rehydrated archived interview {candidate['_id']}")
+    return candidate
+
+
+def is_archived(email: str) -> bool:
+    return mongo.collection(ARCHIVE_COLLECTION).find_one({"email": email}, {"_id": 1}) is not None
+
+
+def stale_candidate_ids(candidates_collection, older_than_days: int = ARCHIVE_AFTER_DAYS, limit: int = 0) -> List[str]:
+    """Candidates with no transcript activity in the last N days.
+
+    The _id range (ObjectIds embed their creation time) narrows the scan before the transcript is looked at.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    pipeline = [
+        {"$match": {"_id": {"$lt": ObjectId.from_datetime(cutoff)}}},
+        {"$project": {"last_active": {"$max": "$chat_history.timestamp"}}},
+        {"$match": {"$or": [{"last_active": None}, {"last_active": {"$lt": cutoff}}]}},
+        {"$project": {"_id": 1}},
+    ]
+    if limit:
+        pipeline.append({"$limit": limit})
+    return [str(doc["_id"]) for doc in candidates_collection.aggregate(pipeline)]
+
+
+def archive_stale(candidates_collection, older_than_days: int = ARCHIVE_AFTER_DAYS, limit: int = 0) -> int:
+    """Archive every stale interview; returns how many were moved."""
+    archived = 0
+    for candidate_id in stale_candidate_ids(candidates_collection, older_than_days, limit):
+        try:
+            archived += archive_candidate(candidates_collection, candidate_id)
+        except Exception as e:
+            print(f"   ❌ Could not archive {candidate_id}: {e}")
+    print(f"🧊 Archived {archived} interviews idle for more than {older_than_days} days")
+    return archived
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move idle interviews into the compressed archive, or bring one back.")
+    parser.add_argument("--older-than-days", type=int, default=ARCHIVE_AFTER_DAYS, help="Archive interviews idle for longer than this")
+    parser.add_argument("--limit", type=int, default=0, help="Archive at most this many interviews (0 = no limit)")
+    parser.add_argument("--rehydrate", metavar="CANDIDATE_ID", help="Restore one archived interview instead of archiving")
+    args = parser.parse_args()
+
+    init_agent(mongo.get_client())
+    candidates = mongo.collection("candidates")
+    if args.rehydrate:
+        print("✅ Restored" if rehydrate(candidates, candidate_id=args.rehydrate) else "❌ Not found in the archive")
+    else:
+        for keys, options in ARCHIVE_INDEXES:
+            mongo.collection(ARCHIVE_COLLECTION).create_index(keys, **options)
+        archive_stale(candidates, args.older_than_days, args.limit)
@@ -0,0 +1,78 @@
+import os
+import time
+from functools import lru_cache
+from typing import List, Tuple
+
+# Messages shown per page of the chat window; "Load older messages" extends it by this much
+CHAT_WINDOW_SIZE = int(os.getenv("CHAT_WINDOW_SIZE", "30"))
+
+
+@lru_cache(maxsize=4096)
+def render_message_html(sender: str, message: str, avatar_url: str) -> str:
+    """HTML for a single chat message; cached, so already-rendered messages cost a dict lookup on reruns.
+
+    The avatar is left out when avatar_url is None (image missing from static/).
+    """
+    if sender == "You":
+        avatar = f'<img src="{avatar_url}" alt="User" class="morty-icon">' if avatar_url else ""
+        return f"""
+        <div class="message-container user-message">
+            <div class="message-sender user-sender">
+                {avatar}
+                You
+            </div>
+            <div class="message-bubble user-bubble">{message}</div>
+        </div>
+        """
+    avatar = f'<img src="{avatar_url}" alt="Rick" class="rick-icon">' if avatar_url else ""
+    return f"""
+        <div class="message-container rick-message">
+            <div class="message-sender rick-sender">
+                {avatar}
+                Rick
+            </div>
+            <div class="message-bubble rick-bubble">{message}</div>
+        </div>
+        """
+
+
+def visible_window(history: List[Tuple[str, str]], window_size: int) -> Tuple[List[Tuple[str, str]], int]:
+    """The most recent window_size messages plus how many older ones are hidden."""
+    hidden = max(len(history) - window_size, 0)
+    return history[hidden:], hidden
+
+
+def build_window_html(history: List[Tuple[str, str]], window_size: int, avatars: dict) -> Tuple[str, int]:
+    """Concatenated HTML for the visible window (one element instead of one per message) and the hidden count."""
+    visible, hidden = visible_window(history, window_size)
+    html = "".join(render_message_html(sender, message, avatars[sender]) for sender, message in visible)
+    return html, hidden
+
+
+def _benchmark(sizes=(10, 50, 100, 250, 500), reruns: int = 200) -> None:
+    """Compare per-rerun render cost of the old full render against the cached, windowed render."""
+    avatars = {"You": "app/static/morty.png", "Rick": "app/static/Robot_Rick.png"}
+    answer = "I'd use a connection pool and cache the hot reads, then measure again. " * 3
+    question = "*burp* Explain how you'd keep p99 latency flat while the multiverse hammers your API, Morty."
+    print(f"{'messages':>10} {'full render (ms)':>18} {'windowed (ms)':>15} {'html KB full':>14} {'html KB window':>16} {'elements':>10}")
+    for size in sizes:
+        history = [("Rick" if i % 2 == 0 else "You", f"{question if i % 2 == 0 else answer} #{i}") for i in range(size)]
+
+        started = time.perf_counter()
+        for _ in range(reruns):
+            full_html = "".join(render_message_html.__wrapped__(sender, message, avatars[sender]) for sender, message in history)
+        full_ms = (time.perf_counter() - started) * 1000 / reruns
+
+        render_message_html.cache_clear()
+        build_window_html(history, CHAT_WINDOW_SIZE, avatars)
+        started = time.perf_counter()
+        for _ in range(reruns):
+            window_html, _ = build_window_html(history, CHAT_WINDOW_SIZE, avatars)
+        window_ms = (time.perf_counter() - started) * 1000 / reruns
+
+        # Old path: one st.markdown per message; new path: one for the window
+        print(f"{size:>10} {full_ms:>18.3f} {window_ms:>15.3f} {len(full_html) / 1024:>14.1f} {len(window_html) / 1024:>16.1f} {f'{size} -> 1':>10}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,137 @@
+import os
+import time
+from typing import Tuple, Union
+
+try:
+    import zstandard
+except ImportError:  # checkpoints are then stored uncompressed
+    zstandard = None
+
+# history and current_thread entries are stored as (code, content) tuples instead of dicts with repeated keys.
+# Checkpoints written before this change (dicts), and tuples that came back from msgpack/JSON as lists, are
+# read through the same accessors.
+SPEAKERS = ("rick", "candidate")
+ENTRY_TYPES = ("question", "response", "fallback")
+SPEAKER_CODES = {speaker: code for code, speaker in enumerate(SPEAKERS)}
+ENTRY_TYPE_CODES = {entry_type: code for code, entry_type in enumerate(ENTRY_TYPES)}
+
+# Serialized checkpoints at least this large are zstd-compressed
+CHECKPOINT_COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "2048"))
+ZSTD_SUFFIX = "+zstd"
+
+Entry = Union[dict, list, tuple]
+
+
+def history_entry(speaker: str, content: str) -> Tuple[int, str]:
+    return (SPEAKER_CODES[speaker], content)
+
+
+def thread_entry(entry_type: str, content: str) -> Tuple[int, str]:
+    return (ENTRY_TYPE_CODES[entry_type], content)
+
+
+def speaker(entry: Entry) -> str:
+    return entry["speaker"] if isinstance(entry, dict) else SPEAKERS[entry[0]]
+
+
+def entry_type(entry: Entry) -> str:
+    return entry["type"] if isinstance(entry, dict) else ENTRY_TYPES[entry[0]]
+
+
+def content(entry: Entry) -> str:
+    return entry["content"] if isinstance(entry, dict) else entry[1]
+
+
+class CompactSerializer:
+    """Checkpoint serde that wraps the checkpointer's own (msgpack-based) serializer and zstd-compresses large payloads.
+
+    Compressed payloads are tagged with a "+zstd" type suffix, so uncompressed checkpoints from before stay readable.
+    """
+
+    def __init__(self, inner, min_bytes: int = CHECKPOINT_COMPRESS_MIN_BYTES):
+        self.inner = inner
+        self.min_bytes = min_bytes
+        self.compressor = zstandard.ZstdCompressor(level=3) if zstandard is not None else None
+        self.decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+    def dumps_typed(self, obj) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if self.compressor is not None and len(data) >= self.min_bytes:
+            return type_ + ZSTD_SUFFIX, self.compressor.compress(data)
+        return type_, data
+
+    def loads_typed(self, data: Tuple[str, bytes]):
+        type_, payload = data
+        if type_.endswith(ZSTD_SUFFIX):
+            if self.decompressor is None:
+                raise RuntimeError("Checkpoint is zstd-compressed - install the zstandard package to read it.")
+            type_, payload = type_[:-len(ZSTD_SUFFIX)], self.decompressor.decompress(payload)
+        return self.inner.loads_typed((type_, payload))
+
+    # Untyped protocol, used for metadata by some checkpointers
+    def dumps(self, obj) -> bytes:
+        return self.inner.dumps(obj)
+
+    def loads(self, data: bytes):
+        return self.inner.loads(data)
+
+
+def _benchmark_text(rng, sentences: int) -> str:
+    """Technical-sounding prose that doesn't repeat itself, so compression isn't measured on copy-pasted strings."""
+    subjects = ["the cache", "a partitioned table", "the event loop", "our ingestion worker", "the read replica", "a bloom filter",
+                "the connection pool", "the GIL", "a materialized view", "the retry queue", "a Redis stream", "the load balancer"]
+    verbs = ["absorbs", "serializes", "invalidates", "batches", "shards", "throttles", "replays", "deduplicates", "prefetches", "compacts"]
+    objects = ["hot keys", "write bursts", "stale reads", "tenant traffic", "p99 latency", "lock contention", "cold starts",
+               "fan-out queries", "schema migrations", "backpressure", "duplicate events", "long transactions"]
+    reasons = ["because the working set fits in memory", "so the primary stays under 60% CPU", "until the nightly compaction runs",
+               "which is why we sized it at {n} connections", "after we saw {n}ms spikes in production", "with a TTL of {n} seconds"]
+
+    def sentence() -> str:
+        subject = rng.choice(subjects)
+        return f"{subject[0].upper()}{subject[1:]} {rng.choice(verbs)} {rng.choice(objects)} {rng.choice(reasons).format(n=rng.randint(2, 900))}."
+    return " ".join(sentence() for _ in range(sentences))
+
+
+def _benchmark(turns=(5, 20, 50), rounds: int = 200) -> None:
+    """Bytes per checkpoint and serialize/deserialize time for dict entries, tuple entries, and tuple entries + zstd."""
+    import random
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from rick_agent import initialize_interview
+
+    plain_serde = JsonPlusSerializer()
+    compact_serde = CompactSerializer(JsonPlusSerializer())
+    variants = (
+        ("dict", lambda s, c: {"speaker": s, "content": c}, lambda t, c: {"type": t, "content": c}, plain_serde),
+        ("tuple", history_entry, thread_entry, plain_serde),
+        ("tuple+zstd", history_entry, thread_entry, compact_serde),
+    )
+
+    print(f"{'turns':>6}" + "".join(f" {label + ' B':>14}" for label, *_ in variants) + "".join(f" {label + ' ser/de ms':>24}" for label, *_ in variants))
+    for count in turns:
+        sizes, timings = [], []
+        for label, make_history, make_thread, serde in variants:
+            # Same seed per variant, so every variant serializes the same text
+            rng = random.Random(count)
+            state = initialize_interview("Morty", ["Python", "PostgreSQL", "Redis"], {"years": 3, "months": 0}, ["Backend Developer"])
+            for i in range(count):
+                question, answer = _benchmark_text(rng, 1), _benchmark_text(rng, rng.randint(2, 6))
+                state["questions"].append(question)
+                state["history"] += [make_history("rick", question), make_history("candidate", answer)]
+            state["current_thread"] = [make_thread("question", _benchmark_text(rng, 1)), make_thread("response", _benchmark_text(rng, 4)),
+                                       make_thread("fallback", _benchmark_text(rng, 1)), make_thread("response", _benchmark_text(rng, 3))]
+
+            started = time.perf_counter()
+            for _ in range(rounds):
+                typed = serde.dumps_typed(state)
+            dump_ms = (time.perf_counter() - started) * 1000 / rounds
+            started = time.perf_counter()
+            for _ in range(rounds):
+                serde.loads_typed(typed)
+            load_ms = (time.perf_counter() - started) * 1000 / rounds
+            sizes.append(len(typed[1]))
+            timings.append(f"{dump_ms:.3f} / {load_ms:.3f}")
+        print(f"{count:>6}" + "".join(f" {size:>14}" for size in sizes) + "".join(f" {timing:>24}" for timing in timings))
+
+
+if __name__ == "__main__":
+    _benchmark()
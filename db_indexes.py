@@ -0,0 +1,129 @@
+from typing import List
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+import mongo
+
+# MongoDB error codes for "an equivalent index already exists under another name/options"
+INDEX_CONFLICT_CODES = {85, 86}
+# "E11000 duplicate key" - a unique index can't be built over data that already has duplicates
+DUPLICATE_KEY_CODE = 11000
+
+# Indexes the app relies on, per (database, collection)
+CANDIDATE_INDEXES = [
+    ([("email", ASCENDING)], {"name": "email_unique", "unique": True}),
+    ([("status", ASCENDING)], {"name": "status"}),
+]
+CHECKPOINT_INDEXES = [
+    ([("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", DESCENDING)], {"name": "thread_checkpoints"}),
+]
+CHECKPOINT_WRITE_INDEXES = [
+    ([("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", ASCENDING), ("task_id", ASCENDING), ("idx", ASCENDING)], {"name": "thread_checkpoint_writes"}),
+]
+
+
+class QueryPlanRegression(Exception):
+    """Raised when a hot query would be answered by a collection scan."""
+
+
+class DuplicateKeysError(Exception):
+    """Raised when a unique index can't be built because existing documents already share a key."""
+
+
+def find_duplicates(collection, keys, limit: int = 20) -> List[dict]:
+    """Key values held by more than one document: [{"_id": {field: value}, "count": n, "ids": [...]}, ...]."""
+    fields = [field for field, _ in keys]
+    return list(collection.aggregate([
+        {"$group": {"_id": {field: f"${field}" for field in fields}, "count": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+        {"$match": {"count": {"$gt": 1}}},
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+    ], allowDiskUse=True))
+
+
+def _create_indexes(collection, indexes) -> None:
+    for keys, options in indexes:
+        try:
+            collection.create_index(keys, **options)
+        except OperationFailure as e:
+            if e.code in INDEX_CONFLICT_CODES:
+                # Same keys already indexed (e.g. created by the checkpointer itself) - that's all we need
+                print(f"   ℹ️ {collection.name}: index on {keys} already exists ({e.details.get('errmsg', '') if e.details else ''})")
+                continue
+            if e.code == DUPLICATE_KEY_CODE and options.get("unique"):
+                # Data written before the index existed (e.g. by a racy check-then-insert) - say exactly what to fix
+                duplicates = find_duplicates(collection, keys)
+                listing = "; ".join(f"{duplicate['_id']} x{duplicate['count']} (_ids {', '.join(str(obj_id) for obj_id in duplicate['ids'])})" for duplicate in duplicates)
+                raise DuplicateKeysError(
+                    f"Cannot create unique index '{options.get('name')}' on {collection.name}: existing documents share keys. "
+                    f"Merge or delete the duplicates and restart (python db_indexes.py --find-duplicates lists them): {listing}"
+                ) from e
+            raise
+
+
+def ensure_indexes(candidates_collection, checkpoint_collection=None, writes_collection=None, extra=None) -> None:
+    """Create (idempotently) every index the hot paths need."""
+    print(f"🗂️ Ensuring MongoDB indexes")
+    _create_indexes(candidates_collection, CANDIDATE_INDEXES)
+    if checkpoint_collection is not None:
+        _create_indexes(checkpoint_collection, CHECKPOINT_INDEXES)
+    if writes_collection is not None:
+        _create_indexes(writes_collection, CHECKPOINT_WRITE_INDEXES)
+    for collection, indexes in (extra or []):
+        _create_indexes(collection, indexes)
+
+
+def _stages(plan) -> List[str]:
+    """Every 'stage' in an explain() plan tree, whatever the server's plan format."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(_stages(value))
+    return stages
+
+
+def hot_queries(candidates_collection, checkpoint_collection=None) -> list:
+    """(description, cursor) pairs for the queries on the request path."""
+    queries = [
+        ("candidates by email (register/login/bootstrap)", candidates_collection.find({"email": "explain@example.com"})),
+        ("candidates by status", candidates_collection.find({"status": "registered"})),
+    ]
+    if checkpoint_collection is not None:
+        queries.append((
+            "latest checkpoint for a thread",
+            checkpoint_collection.find({"thread_id": "explain", "checkpoint_ns": ""}).sort("checkpoint_id", DESCENDING).limit(1)
+        ))
+    return queries
+
+
+def verify_query_plans(queries) -> None:
+    """Run explain() on each hot query and fail loudly if any would do a COLLSCAN."""
+    regressions = []
+    for description, cursor in queries:
+        stages = _stages(cursor.explain().get("queryPlanner", {}))
+        status = "❌ COLLSCAN" if "COLLSCAN" in stages else "✅"
+        print(f"   {status} {description}: {' > '.join(stages) or 'n/a'}")
+        if "COLLSCAN" in stages:
+            regressions.append(description)
+    if regressions:
+        raise QueryPlanRegression(f"Hot queries regressed to collection scans: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    import sys
+    from rick_agent import CHECKPOINT_DB_NAME, CHECKPOINT_COLLECTION_NAME, WRITES_COLLECTION_NAME
+    client = mongo.get_client()
+    candidates = mongo.collection("candidates")
+    if "--find-duplicates" in sys.argv[1:]:
+        for keys, options in CANDIDATE_INDEXES:
+            if options.get("unique"):
+                for duplicate in find_duplicates(candidates, keys, limit=1000):
+                    print(f"{options['name']}: {duplicate['_id']} x{duplicate['count']} -> {', '.join(str(obj_id) for obj_id in duplicate['ids'])}")
+        sys.exit(0)
+    checkpoints = client[CHECKPOINT_DB_NAME][CHECKPOINT_COLLECTION_NAME]
+    ensure_indexes(candidates, checkpoints, client[CHECKPOINT_DB_NAME][WRITES_COLLECTION_NAME])
+    verify_query_plans(hot_queries(candidates, checkpoints))
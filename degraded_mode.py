@@ -0,0 +1,148 @@
+import re
+from typing import List
+
+# Local responses used when the LLM backend is unavailable (circuit breaker open or call failed).
+# Everything here is pure Python and returns instantly.
+
+LOCAL_QUESTION_BANK = {
+    "python": [
+        "Alright, genius, *burp* explain what the GIL actually locks in CPython and when threads still help you.",
+        "Tell me how Python generators keep their state between yields, and why that beats building a giant list, Morty-brain.",
+        "What's the difference between a shallow and a deep copy in Python, and when does it bite you? Don't make me wait.",
+    ],
+    "javascript": [
+        "Explain the JavaScript event loop - microtasks vs macrotasks - before I *burp* lose interest in this dimension.",
+        "What does 'this' point to inside an arrow function versus a regular function? Go on, impress me.",
+    ],
+    "typescript": [
+        "Tell me when you'd reach for a TypeScript generic constraint instead of 'any', and don't say 'never', Morty.",
+    ],
+    "react": [
+        "Why does React need keys on list items, and what breaks when you use the array index? *burp*",
+        "Explain when useEffect runs and how you avoid an infinite render loop. Even Jerry could get this one.",
+    ],
+    "node.js": [
+        "How does Node.js handle thousands of connections on one thread, and what kills that model?",
+    ],
+    "sql": [
+        "Explain what an index does to a SQL query plan and when it makes writes slower. *burp* Quick.",
+        "What's the difference between INNER JOIN and LEFT JOIN, and when does LEFT JOIN give you NULLs?",
+    ],
+    "mongodb": [
+        "When would you embed documents in MongoDB versus referencing them? Think bigger than a Jerry-sized dataset.",
+    ],
+    "docker": [
+        "What's the actual difference between a Docker image and a container, and why do layers matter for builds?",
+    ],
+    "kubernetes": [
+        "Explain what a Kubernetes Deployment does that a bare Pod doesn't. *burp* Don't hand-wave it.",
+    ],
+    "aws": [
+        "When would you pick SQS over SNS on AWS, and what happens to a message nobody consumes?",
+    ],
+    "java": [
+        "Explain how Java's garbage collector decides what to collect, and what a memory leak looks like anyway.",
+    ],
+    "git": [
+        "What's the difference between git merge and git rebase, and when does rebase ruin your teammates' day?",
+    ],
+}
+
+GENERIC_QUESTIONS = [
+    "Walk me through how you'd debug a service that's slow only in production. *burp* Step by step.",
+    "Explain the difference between concurrency and parallelism like I'm a Gazorpazorp - which, thankfully, I'm not.",
+    "How would you design a cache for an API, and how do you keep it from serving stale garbage?",
+    "Tell me what happens between typing a URL in a browser and the page rendering. Go, the multiverse is waiting.",
+    "What makes a good unit test, and when is mocking just lying to yourself?",
+]
+
+GREETING_TEMPLATES = [
+    "Alright {name}... *burp* Are you ready to get schwifty in this tech interview?",
+    "{name}, Rick Sanchez here, *burp* running your interview on {tech}. Ready or do you need a minute?",
+    "Listen up {name}, I've seen your {tech} resume and I've seen better in the Citadel. *burp* Ready to start?",
+]
+
+FOLLOW_UP_GREETING_TEMPLATES = [
+    "*burp* So, {name}, are you ready this time or what?",
+    "Come on {name}, the multiverse isn't getting any younger. *burp* Ready to start?",
+]
+
+GUIDANCE_TEMPLATES = [
+    "That's not even close to what I asked. Try focusing on the actual question, *burp*",
+    "Whoa, {name}, wrong dimension. *burp* Read the question again and answer THAT one.",
+    "Focus, {name}! We're talking {tech} here, not whatever that was.",
+]
+
+PERSONALIZED_TEMPLATES = [
+    "That's not even close. Try again, and this time use your brain.",
+    "{name}, *burp* I've had more coherent answers from a Meeseeks on day three. One more time.",
+    "Seriously, {name}? Give me something real or hit 'Interview Controls' and call it a day. *burp*",
+]
+
+READY_INDICATORS = ["yes", "ready", "let's go", "start", "begin", "sure", "yep", "yeah", "ok", "okay", "i'm ready", "im ready"]
+
+_WORD_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9+#.]*")
+_STOPWORDS = {
+    "the", "a", "an", "and", "or", "of", "to", "in", "on", "for", "is", "are", "it", "this", "that", "with",
+    "what", "how", "why", "when", "you", "your", "me", "i", "do", "does", "explain", "tell", "between", "like",
+}
+
+
+def _content_words(text: str) -> set:
+    return {word.lower().strip(".") for word in _WORD_RE.findall(text) if word.lower() not in _STOPWORDS and len(word) > 2}
+
+
+def local_question(tech_stack: List[str], previous_questions: List[str], question_index: int = 0) -> str:
+    """Pick an unasked question from the local bank, rotating through the candidate's tech stack."""
+    asked = set(previous_questions or [])
+    stack = [tech.lower() for tech in tech_stack] or [""]
+    for offset in range(len(stack)):
+        tech = stack[(question_index + offset) % len(stack)]
+        for question in LOCAL_QUESTION_BANK.get(tech, []):
+            if question not in asked:
+                return question
+    for question in GENERIC_QUESTIONS:
+        if question not in asked:
+            return question
+    return GENERIC_QUESTIONS[question_index % len(GENERIC_QUESTIONS)]
+
+
+def heuristic_evaluation(question: str, answer: str, tech_stack: List[str]) -> str:
+    """Rough 'relevant' / 'irrelevant' / 'gibberish' verdict from the answer's shape and overlap with the question."""
+    words = _WORD_RE.findall(answer)
+    letters = sum(ch.isalpha() for ch in answer)
+    if not words or letters < 0.5 * max(len(answer.strip()), 1):
+        return "gibberish"
+    if not any(re.search(r"[aeiouy]", word.lower()) for word in words) or re.search(r"(.)\1{5,}", answer):
+        return "gibberish"
+
+    answer_words = _content_words(answer)
+    overlap = answer_words & (_content_words(question) | {tech.lower() for tech in tech_stack})
+    if len(words) >= 8 and overlap:
+        return "relevant"
+    if len(words) >= 25:
+        # Long, word-like answers are given the benefit of the doubt
+        return "relevant"
+    return "irrelevant"
+
+
+def heuristic_readiness(response: str) -> bool:
+    """Simple keyword check for whether the candidate said they're ready."""
+    response_lower = response.lower()
+    return any(indicator in response_lower for indicator in READY_INDICATORS)
+
+
+def _fill(template: str, name: str, tech_stack: List[str]) -> str:
+    return template.format(name=name, tech=", ".join(tech_stack[:3]) or "your so-called tech stack")
+
+
+def templated_greeting(name: str, tech_stack: List[str], follow_up: bool = False, rotation: int = 0) -> str:
+    """Greeting (or readiness re-prompt) filled from local templates."""
+    templates = FOLLOW_UP_GREETING_TEMPLATES if follow_up else GREETING_TEMPLATES
+    return _fill(templates[rotation % len(templates)], name, tech_stack)
+
+
+def templated_fallback(name: str, tech_stack: List[str], attempt: int, guidance: bool) -> str:
+    """Fallback line for an off-topic or weak answer, escalating with the attempt number."""
+    templates = GUIDANCE_TEMPLATES if guidance else PERSONALIZED_TEMPLATES
+    return _fill(templates[max(attempt - 1, 0) % len(templates)], name, tech_stack)
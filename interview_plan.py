@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+from llm_client import chat_completion, llm_available
+from question_similarity import QuestionIndex
+
+# Plan mode: one structured call (made in the background) lays out the next K base questions, served from state with no LLM latency
+INTERVIEW_PLAN_ENABLED = os.getenv("INTERVIEW_PLAN_ENABLED", "true").lower() == "true"
+PLAN_SIZE = int(os.getenv("INTERVIEW_PLAN_SIZE", "6"))
+# Refill in the background once this many planned questions are left
+PLAN_REFILL_THRESHOLD = int(os.getenv("INTERVIEW_PLAN_REFILL_THRESHOLD", "2"))
+DIFFICULTIES = ("warm-up", "core", "deep-dive")
+# Refills nobody picked up within this long (abandoned interviews) are dropped
+REFILL_TTL_SECONDS = float(os.getenv("INTERVIEW_PLAN_REFILL_TTL_SECONDS", "3600"))
+
+# Background plans and refills land here (thread_id -> planned items) and are merged into state on the next RickAgent step;
+# state itself is only ever written by graph nodes, so the checkpoint stays the single source of truth.
+_refills = {}  # thread_id -> (time.monotonic() stored, [planned items])
+_refilling = set()
+# In-flight refills whose interview was discarded meanwhile - their result is dropped when it lands
+_cancelled = set()
+_lock = threading.Lock()
+
+
+def _experience_str(experience: dict) -> str:
+    experience_str = f"{experience.get('years', 0)} years"
+    if experience.get("months", 0) > 0:
+        experience_str += f" and {experience['months']} months"
+    return experience_str
+
+
+def generate_plan(tech_stack: List[str], experience: dict, interested_roles: List[str], asked: List[str] = None, count: int = PLAN_SIZE, start_difficulty: str = "warm-up") -> List[dict]:
+    """One structured call for an ordered plan of base questions: [{"question", "topic", "difficulty"}, ...]."""
+    asked_context = "\n".join(f"- {question}" for question in (asked or [])) or "(none yet)"
+    prompt = f"""You are Rick Sanchez from Rick and Morty, planning a technical interview.
+    Candidate Details:
+    - Tech Stack: {', '.join(tech_stack)}
+    - Experience: {_experience_str(experience)}
+    - Interested Roles: {', '.join(interested_roles)}
+    Questions already asked:
+    {asked_context}
+
+    Plan the next {count} base questions, in the order they should be asked.
+    - Spread them across the tech stack so every technology gets covered before any repeats.
+    - Ramp difficulty starting at "{start_difficulty}": difficulty is one of {', '.join(DIFFICULTIES)}, never decreasing.
+    - Tailor them to the candidate's experience level and role interests.
+    - Each question sounds like Rick (sarcasm, scientific jargon), is under 2 sentences, and covers different ground than the others and the ones already asked.
+    Respond with ONLY a JSON object: {{"plan": [{{"question": "...", "topic": "<one technology from the stack>", "difficulty": "..."}}]}}"""
+
+    answer = chat_completion([{"role": "user", "content": prompt}], temperature=0.7, kind="plan", response_format={"type": "json_object"})
+    items = json.loads(answer).get("plan", [])
+
+    index = QuestionIndex(asked or [])
+    plan = []
+    for item in items:
+        question = str(item.get("question", "")).strip() if isinstance(item, dict) else ""
+        if not question or index.is_near_duplicate(question):
+            continue
+        index.add(question)
+        difficulty = item.get("difficulty") if item.get("difficulty") in DIFFICULTIES else "core"
+        plan.append({"question": question, "topic": str(item.get("topic", "")), "difficulty": difficulty})
+    return plan
+
+
+def _refill(thread_id: str, tech_stack: List[str], experience: dict, interested_roles: List[str], asked: List[str], start_difficulty: str) -> None:
+    try:
+        plan = generate_plan(tech_stack, experience, interested_roles, asked, start_difficulty=start_difficulty)
+        with _lock:
+            if thread_id in _cancelled:
+                return
+            now = time.monotonic()
+            for stale in [key for key, (stored_at, _) in _refills.items() if now - stored_at > REFILL_TTL_SECONDS]:
+                del _refills[stale]
+            _refills[thread_id] = (now, _refills.get(thread_id, (now, []))[1] + plan)
+        print(f"   🗺️ Background plan refill for {thread_id}: {len(plan)} questions")
+    except Exception as e:
+        print(f"   ⚠️ Background plan refill for {thread_id} failed: {e}")
+    finally:
+        with _lock:
+            _refilling.discard(thread_id)
+            _cancelled.discard(thread_id)
+
+
+def schedule_refill(thread_id: str, state: dict) -> None:
+    """Start a background plan (or refill) when the plan is empty or runs low - at most one in flight per interview.
+
+    Called when the candidate becomes ready, so the first plan never adds a planning call to that turn; until it
+    lands, questions come from the usual bank / live generation. Skipped while the LLM circuit is open.
+    """
+    if not INTERVIEW_PLAN_ENABLED or not thread_id or len(state.get("plan", [])) > PLAN_REFILL_THRESHOLD:
+        return
+    if not llm_available():
+        return
+    with _lock:
+        if thread_id in _refilling:
+            return
+        _refilling.add(thread_id)
+    remaining = state.get("plan", [])
+    # Everything asked or still planned counts as "asked", so the refill continues the plan instead of repeating it
+    asked = list(state.get("questions", [])) + [item["question"] for item in remaining]
+    # A first plan starts easy; a plan that ran dry mid-interview picks up at the hard end
+    start_difficulty = remaining[-1]["difficulty"] if remaining else ("deep-dive" if state.get("questions") else "warm-up")
+    threading.Thread(
+        target=_refill,
+        args=(thread_id, list(state["tech_stack"]), dict(state.get("experience", {})), list(state.get("interested_roles", [])), asked, start_difficulty),
+        name=f"plan-refill-{thread_id}",
+        daemon=True
+    ).start()
+
+
+def next_planned_question(state: dict, thread_id: Optional[str]) -> Optional[dict]:
+    """Pop the next planned question that isn't a near-duplicate of one already asked; None when the plan is empty."""
+    if thread_id:
+        with _lock:
+            _, refill = _refills.pop(thread_id, (None, []))
+        state.setdefault("plan", []).extend(refill)
+    plan = state.get("plan") or []
+    index = QuestionIndex(state.get("questions", []))
+    while plan:
+        item = plan.pop(0)
+        if not index.is_near_duplicate(item["question"]):
+            return item
+    return None
+
+
+def discard(thread_id: str) -> None:
+    """Forget a finished interview's pending refill, including one still being generated."""
+    with _lock:
+        _refills.pop(thread_id, None)
+        if thread_id in _refilling:
+            _cancelled.add(thread_id)
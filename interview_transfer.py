@@ -0,0 +1,189 @@
+import io
+import os
+import sys
+import gzip
+import zlib
+import argparse
+from typing import Iterator, Optional
+from dotenv import load_dotenv
+from bson import json_util
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from rick_agent import interview_service, init_agent
+import mongo
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional - gzip and plain NDJSON always work
+    zstandard = None
+
+# Load environment variables
+load_dotenv()
+TRANSFER_BATCH_SIZE = int(os.getenv("TRANSFER_BATCH_SIZE", "500"))
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+# Extended JSON keeps ObjectIds and datetimes intact through a round trip
+JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS
+
+# One NDJSON line per interview:
+#   {"candidate": {...candidate document incl. chat_history...}, "graph_state": {...final LangGraph values...} | null}
+
+
+class PartialImportError(Exception):
+    """A bulk write failed part-way through an import; counts holds what was applied before it."""
+
+    def __init__(self, message: str, counts: dict):
+        super().__init__(message)
+        self.counts = counts
+
+
+def _compressor(compression: Optional[str]):
+    """Incremental compressor with compress()/flush(), or None for plain NDJSON."""
+    if compression in (None, "", "none"):
+        return None
+    if compression == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    if compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package.")
+        return zstandard.ZstdCompressor().compressobj()
+    raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSIONS)}.")
+
+
+def _text_reader(stream, compression: Optional[str]):
+    """Line-iterable text view over a (possibly compressed) binary stream - decompressed as it is read."""
+    if compression == "gzip":
+        stream = gzip.GzipFile(fileobj=stream, mode="rb")
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression needs the zstandard package.")
+        stream = zstandard.ZstdDecompressor().stream_reader(stream)
+    elif compression not in (None, "", "none"):
+        raise ValueError(f"Unknown compression '{compression}', expected one of {', '.join(COMPRESSIONS)}.")
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def compression_for(path: str) -> str:
+    """Guess the compression from a file name (.gz / .zst)."""
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return "none"
+
+
+def iter_export(candidates_collection, batch_size: int = TRANSFER_BATCH_SIZE, compression: str = None, include_state: bool = True, include_credentials: bool = False, query: dict = None) -> Iterator[bytes]:
+    """Stream interviews as (optionally compressed) NDJSON chunks, one chunk per cursor batch.
+
+    The server-side cursor hands back batch_size documents at a time, so memory is bounded by one batch
+    regardless of how many interviews are exported.
+    """
+    compressor = _compressor(compression)
+    projection = None if include_credentials else {"password": 0}
+    cursor = candidates_collection.find(query or {}, projection, batch_size=batch_size, no_cursor_timeout=True)
+    try:
+        lines = []
+        for candidate in cursor:
+            record = {"candidate": candidate, "graph_state": (interview_service.get_state_values(str(candidate["_id"])) or None) if include_state else None}
+            lines.append(json_util.dumps(record, json_options=JSON_OPTIONS))
+            if len(lines) >= batch_size:
+                chunk = ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+                yield compressor.compress(chunk) if compressor else chunk
+        chunk = ("\n".join(lines) + "\n").encode("utf-8") if lines else b""
+        if compressor:
+            yield compressor.compress(chunk) + compressor.flush()
+        elif chunk:
+            yield chunk
+    finally:
+        cursor.close()
+
+
+def import_stream(candidates_collection, stream, batch_size: int = TRANSFER_BATCH_SIZE, compression: str = None, include_state: bool = True) -> dict:
+    """Load an export produced by iter_export: candidates via ordered bulk_write, graph state via update_state.
+
+    Lines are read and written batch_size at a time, so memory stays flat for any export size.
+    Existing candidates with the same _id are replaced. Records exported without credentials (every HTTP export)
+    update the exported fields of an existing candidate and keep its stored password; those without a stored
+    candidate to update are skipped, since they could never log in. A failed write (e.g. an email another candidate
+    already uses) stops the import with PartialImportError; everything before it stays applied.
+    """
+    counts = {"candidates": 0, "graph_states": 0, "skipped_without_credentials": 0}
+    batch = []
+
+    def operation(record: dict):
+        candidate = record["candidate"]
+        if "password" in candidate:
+            return ReplaceOne({"_id": candidate["_id"]}, candidate, upsert=True)
+        return UpdateOne({"_id": candidate["_id"]}, {"$set": {key: value for key, value in candidate.items() if key != "_id"}})
+
+    def flush():
+        if not batch:
+            return
+        missing_credentials = [record["candidate"]["_id"] for record in batch if "password" not in record["candidate"]]
+        existing = {doc["_id"] for doc in candidates_collection.find({"_id": {"$in": missing_credentials}}, {"_id": 1})} if missing_credentials else set()
+        records = []
+        for record in batch:
+            if "password" in record["candidate"] or record["candidate"]["_id"] in existing:
+                records.append(record)
+            else:
+                print(f"⚠️ Skipping candidate {record['candidate']['_id']}: exported without credentials and not present here")
+                counts["skipped_without_credentials"] += 1
+        error = None
+        try:
+            if records:
+                candidates_collection.bulk_write([operation(record) for record in records], ordered=True)
+            applied = records
+        except BulkWriteError as e:
+            # Ordered - every operation before the first error was applied, nothing after it
+            error = (e.details.get("writeErrors") or [{}])[0]
+            applied = records[:error.get("index", 0)]
+        counts["candidates"] += len(applied)
+        if include_state:
+            for record in applied:
+                if record.get("graph_state"):
+                    interview_service.restore_state(str(record["candidate"]["_id"]), record["graph_state"])
+                    counts["graph_states"] += 1
+        if error is not None:
+            failed = records[error.get("index", 0)]["candidate"].get("_id")
+            raise PartialImportError(f"Import stopped at candidate {failed}: {error.get('errmsg', 'write error')}", counts)
+        batch.clear()
+
+    for line in _text_reader(stream, compression):
+        if line.strip():
+            batch.append(json_util.loads(line, json_options=JSON_OPTIONS))
+            if len(batch) >= batch_size:
+                flush()
+    flush()
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export or import interviews (candidates, transcripts and LangGraph state) as NDJSON.")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path", help="NDJSON file (.gz / .zst are compressed accordingly); '-' for stdout/stdin")
+    parser.add_argument("--batch-size", type=int, default=TRANSFER_BATCH_SIZE, help="Documents per cursor batch / bulk_write")
+    parser.add_argument("--compression", choices=COMPRESSIONS, help="Override the compression guessed from the file name")
+    parser.add_argument("--no-state", action="store_true", help="Skip the LangGraph interview state")
+    parser.add_argument("--include-credentials", action="store_true", help="Export passwords too (needed for candidates to log in after a move)")
+    args = parser.parse_args()
+
+    init_agent(mongo.get_client())
+    candidates = mongo.collection("candidates")
+    compression = args.compression or compression_for(args.path)
+
+    if args.command == "export":
+        out = sys.stdout.buffer if args.path == "-" else open(args.path, "wb")
+        with out:
+            for chunk in iter_export(candidates, args.batch_size, compression, not args.no_state, args.include_credentials):
+                out.write(chunk)
+        print(f"📦 Export written to {args.path}", file=sys.stderr)
+    else:
+        source = sys.stdin.buffer if args.path == "-" else open(args.path, "rb")
+        with source:
+            try:
+                counts = import_stream(candidates, source, args.batch_size, compression, not args.no_state)
+            except PartialImportError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                counts = e.counts
+        print(f"📦 Imported {counts['candidates']} candidates, {counts['graph_states']} interview states, skipped {counts['skipped_without_credentials']} without credentials", file=sys.stderr)
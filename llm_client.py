@@ -0,0 +1,320 @@
+import os
+import re
+import json
+import time
+import random
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+from typing import List, Optional, Sequence
+import openai
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Budget for a whole graph turn - must stay below the 60s read timeout used by app.py's make_api_request
+TURN_BUDGET_SECONDS = float(os.getenv("LLM_TURN_BUDGET_SECONDS", "45"))
+# Upper bound for any single completion attempt, even when the turn still has more budget left
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("LLM_REQUEST_TIMEOUT_SECONDS", "20"))
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "4"))
+HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "true").lower() == "true"
+# Hedge delay used until enough latency samples have been collected for a call kind
+HEDGE_DEFAULT_DELAY_SECONDS = float(os.getenv("LLM_HEDGE_DEFAULT_DELAY_SECONDS", "3"))
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+# Circuit breaker: trips after this many consecutive failed or slow calls, then probes again after the cooldown
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_SLOW_CALL_SECONDS = float(os.getenv("LLM_BREAKER_SLOW_CALL_SECONDS", "15"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("LLM_BREAKER_COOLDOWN_SECONDS", "30"))
+# Classification calls: a label is a word or two, so cap output hard
+CLASSIFY_MAX_TOKENS = int(os.getenv("LLM_CLASSIFY_MAX_TOKENS", "3"))
+# Enum-constrained JSON output - needs a model with structured outputs (gpt-4-turbo only has plain JSON mode)
+CLASSIFY_STRUCTURED_OUTPUTS = os.getenv("LLM_CLASSIFY_STRUCTURED_OUTPUTS", "false").lower() == "true"
+CLASSIFY_MODEL = os.getenv("LLM_CLASSIFY_MODEL", "gpt-4-turbo")
+MIN_LABEL_PREFIX = 3
+
+# Errors worth retrying - everything else (bad request, auth, ...) fails immediately
+TRANSIENT_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the current turn has no time budget left for another LLM call."""
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting OpenAI while the circuit breaker is open."""
+
+
+# Absolute deadline (time.monotonic) of the turn currently being processed, if any
+_turn_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("turn_deadline", default=None)
+
+_client = None
+_client_lock = threading.Lock()
+_hedge_executor = ThreadPoolExecutor(max_workers=int(os.getenv("LLM_HEDGE_WORKERS", "8")), thread_name_prefix="llm-hedge")
+
+
+def get_client() -> openai.OpenAI:
+    """Return the shared OpenAI client; retries are handled here, so the SDK's own retries are disabled."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = openai.OpenAI(api_key=openai.api_key or os.getenv("OPENAI_API_KEY"), max_retries=0)
+    return _client
+
+
+@contextmanager
+def turn_deadline(budget_seconds: float = None):
+    """Bound every LLM call made inside the block (i.e. every graph node of one turn) by a shared deadline."""
+    budget = TURN_BUDGET_SECONDS if budget_seconds is None else budget_seconds
+    token = _turn_deadline.set(time.monotonic() + budget)
+    try:
+        yield
+    finally:
+        _turn_deadline.reset(token)
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current turn, or None when no deadline is active."""
+    deadline = _turn_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+class LatencyTracker:
+    """Rolling latency window per call kind, used to derive the hedge delay."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self.window = window
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, kind: str, seconds: float) -> None:
+        with self.lock:
+            self.samples.setdefault(kind, deque(maxlen=self.window)).append(seconds)
+
+    def p95(self, kind: str) -> Optional[float]:
+        with self.lock:
+            samples = sorted(self.samples.get(kind, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+latency_tracker = LatencyTracker()
+
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures or slow calls -> half_open probe after a cooldown -> closed on success."""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD, slow_call_seconds: float = BREAKER_SLOW_CALL_SECONDS, cooldown_seconds: float = BREAKER_COOLDOWN_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.trip_count = 0
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """Whether a call may go to OpenAI right now; lets a single probe through once the cooldown has passed."""
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown_seconds:
+                self.state = "half_open"
+                print(f"   🔌 LLM circuit half-open, probing backend")
+            if self.state == "half_open" and not self.probe_in_flight:
+                self.probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self, seconds: float) -> None:
+        if seconds >= self.slow_call_seconds:
+            self.record_failure(f"slow call ({seconds:.1f}s)")
+            return
+        with self.lock:
+            if self.state != "closed":
+                print(f"   🔌 LLM circuit closed, backend recovered")
+            self.state = "closed"
+            self.consecutive_failures = 0
+            self.probe_in_flight = False
+
+    def record_failure(self, reason: str) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            self.probe_in_flight = False
+            if self.state == "half_open" or (self.state == "closed" and self.consecutive_failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                self.trip_count += 1
+                print(f"   🔌 LLM circuit OPEN after {reason} - serving degraded responses for {self.cooldown_seconds:.0f}s")
+
+    def release_probe(self) -> None:
+        """Free the half-open probe slot after a call that says nothing about backend health (bad request, auth, ...)."""
+        with self.lock:
+            self.probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """True while nodes should skip the LLM entirely (does not consume the half-open probe)."""
+        with self.lock:
+            return self.state == "open" and time.monotonic() - self.opened_at < self.cooldown_seconds
+
+    def snapshot(self) -> dict:
+        """Breaker state for the status endpoint."""
+        with self.lock:
+            retry_in = max(0.0, self.cooldown_seconds - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "trip_count": self.trip_count,
+                "retry_in_seconds": round(retry_in, 1),
+                "failure_threshold": self.failure_threshold,
+                "slow_call_seconds": self.slow_call_seconds,
+            }
+
+
+llm_breaker = CircuitBreaker()
+
+
+def llm_available() -> bool:
+    """Cheap check nodes use to go straight to their degraded path while the breaker is open."""
+    return not llm_breaker.is_open()
+
+
+def _attempt_timeout() -> float:
+    """Timeout for a single attempt: the per-request cap, shortened to what is left of the turn."""
+    remaining = remaining_budget()
+    if remaining is None:
+        return REQUEST_TIMEOUT_SECONDS
+    if remaining <= 0:
+        raise DeadlineExceeded("Turn deadline exceeded before the LLM call could be made")
+    return min(REQUEST_TIMEOUT_SECONDS, remaining)
+
+
+def _create(kind: str, timeout: float, **kwargs):
+    """Single completion request, timed for the latency tracker and reported to the circuit breaker."""
+    if not llm_breaker.allow_request():
+        raise CircuitOpenError(f"LLM circuit is open, skipping {kind} call")
+    started = time.monotonic()
+    try:
+        response = get_client().chat.completions.create(timeout=timeout, **kwargs)
+    except TRANSIENT_ERRORS as e:
+        llm_breaker.record_failure(type(e).__name__)
+        raise
+    except Exception:
+        # Not a backend health problem (bad request, auth, ...) - leave the breaker's state and failure count alone
+        llm_breaker.release_probe()
+        raise
+    elapsed = time.monotonic() - started
+    latency_tracker.record(kind, elapsed)
+    llm_breaker.record_success(elapsed)
+    return response
+
+
+def _hedged_create(kind: str, timeout: float, **kwargs):
+    """Send the request, and a duplicate if the first one is slower than the p95 for this kind; first answer wins."""
+    hedge_delay = latency_tracker.p95(kind) or HEDGE_DEFAULT_DELAY_SECONDS
+    if hedge_delay >= timeout:
+        return _create(kind, timeout, **kwargs)
+
+    primary = _hedge_executor.submit(contextvars.copy_context().run, _create, kind, timeout, **kwargs)
+    done, _ = wait([primary], timeout=hedge_delay)
+    if done:
+        return primary.result()
+
+    print(f"   ⏱️ Hedging {kind} call after {hedge_delay:.2f}s")
+    hedge = _hedge_executor.submit(contextvars.copy_context().run, _create, kind, timeout - hedge_delay, **kwargs)
+    pending = {primary, hedge}
+    last_error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            last_error = future.exception()
+    raise last_error
+
+
+def _backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+
+def chat_completion(messages: List[dict], model: str = "gpt-4-turbo", temperature: float = 0.7, kind: str = "default", hedge: bool = False, **kwargs) -> str:
+    """Run a chat completion within the turn deadline, retrying transient errors, and return the stripped message text."""
+    attempt = 0
+    while True:
+        timeout = _attempt_timeout()
+        try:
+            if hedge and HEDGING_ENABLED:
+                response = _hedged_create(kind, timeout, model=model, messages=messages, temperature=temperature, **kwargs)
+            else:
+                response = _create(kind, timeout, model=model, messages=messages, temperature=temperature, **kwargs)
+            return response.choices[0].message.content.strip()
+        except TRANSIENT_ERRORS as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = _backoff_delay(attempt)
+            remaining = remaining_budget()
+            if remaining is not None and remaining <= delay:
+                raise
+            print(f"   🔁 Transient {type(e).__name__} on {kind} call, retry {attempt + 1}/{MAX_RETRIES} in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+
+def _match_label(text: str, labels: Sequence[str]) -> Optional[str]:
+    """The label the model answered with, tolerating case, quotes and trailing punctuation; None if off-script."""
+    word = re.sub(r"[^a-z_]", "", text.strip().lower().split()[0]) if text.strip() else ""
+    if word in labels:
+        return word
+    # A label cut short by the token cap still counts, but only from MIN_LABEL_PREFIX letters - "i" or "r" is not a verdict
+    prefixed = [label for label in labels if len(word) >= MIN_LABEL_PREFIX and label.startswith(word)]
+    return prefixed[0] if len(prefixed) == 1 else None
+
+
+def classify(messages: List[dict], labels: Sequence[str], default: Optional[str], kind: str = "classify", hedge: bool = False, model: str = None) -> Optional[str]:
+    """Classification call mode: output capped at a few tokens (or enum-constrained JSON), validated against labels.
+
+    Returns one of labels, or default when the model answers off-script. Transport errors still raise, so callers
+    keep their degraded-mode fallbacks.
+    """
+    model = model or CLASSIFY_MODEL
+    if CLASSIFY_STRUCTURED_OUTPUTS:
+        schema = {
+            "type": "object",
+            "properties": {"label": {"type": "string", "enum": list(labels)}},
+            "required": ["label"],
+            "additionalProperties": False,
+        }
+        answer = chat_completion(
+            messages, model=model, temperature=0, kind=kind, hedge=hedge, max_tokens=16,
+            response_format={"type": "json_schema", "json_schema": {"name": "classification", "strict": True, "schema": schema}}
+        )
+        try:
+            label = json.loads(answer).get("label")
+        except (ValueError, AttributeError):
+            label = None
+        label = label if label in labels else None
+    else:
+        answer = chat_completion(messages, model=model, temperature=0, kind=kind, hedge=hedge, max_tokens=CLASSIFY_MAX_TOKENS, stop=["\n"])
+        label = _match_label(answer, labels)
+    if label is None:
+        print(f"   ⚠️ Off-script {kind} classification {answer[:30]!r}, using {default!r}")
+        return default
+    return label
+
@@ -1,20 +1,93 @@
-from fastapi import FastAPI, HTTPException
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect, Response, Header
+from starlette.concurrency import run_in_threadpool
+from anyio import from_thread
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 import openai
 import os
+import json
+import asyncio
+from datetime import datetime
 from dotenv import load_dotenv
 from pymongo import MongoClient
+from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
-from rick_agent import interview_service
+from rick_agent import interview_service, init_agent, warmup, CHECKPOINT_DB_NAME, CHECKPOINT_COLLECTION_NAME, WRITES_COLLECTION_NAME
+from db_indexes import ensure_indexes, verify_query_plans, hot_queries
+import question_bank
+import response_pool
+import analytics
+import interview_transfer
+import archive
+import profiling
+import mongo
+from llm_client import llm_breaker
+from profile_cache import profile_cache
+from transcript_writer import transcript_writer, TranscriptFlushError
 
 # Load API key from .env
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 openai.api_key = OPENAI_API_KEY
 
+# Fail startup if a hot query would fall back to a collection scan
+VERIFY_QUERY_PLANS = os.getenv("VERIFY_QUERY_PLANS", "true").lower() == "true"
+
+# Connections are created in the lifespan, not at import time
+client = None
+db = None
+candidates_collection = None
+checkpoint_db = None
+
+# Cold-start measurements exposed by /ready
+readiness = {"ready": False, "import_ms": None, "time_to_ready_ms": None, "warmup": {}}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect MongoDB, compile the interview graph, prepare indexes and warm connection pools before serving."""
+    global client, db, candidates_collection, checkpoint_db
+    started = time.perf_counter()
+
+    # One MongoClient (and pool) shared by the API, the checkpointer and every module going through mongo.collection()
+    client = MongoClient(mongo.MONGO_URI)
+    mongo.bind(client)
+    db = client[mongo.APP_DB_NAME]
+    candidates_collection = db["candidates"]
+    checkpoint_db = client[CHECKPOINT_DB_NAME]
+    init_agent(client)
+    transcript_writer.bind(candidates_collection)
+    transcript_writer.start()
+    analytics.start()
+
+    ensure_indexes(
+        candidates_collection,
+        checkpoint_db[CHECKPOINT_COLLECTION_NAME],
+        checkpoint_db[WRITES_COLLECTION_NAME],
+        extra=[(mongo.collection(analytics.ROLLUP_COLLECTION), analytics.ROLLUP_INDEXES),
+            (mongo.collection(archive.ARCHIVE_COLLECTION), archive.ARCHIVE_INDEXES),
+            (mongo.collection(profiling.PROFILE_COLLECTION), profiling.PROFILE_INDEXES)]
+    )
+    question_bank.ensure_indexes()
+    if VERIFY_QUERY_PLANS:
+        verify_query_plans(hot_queries(candidates_collection, checkpoint_db[CHECKPOINT_COLLECTION_NAME]))
+
+    readiness["warmup"] = warmup()
+    readiness["time_to_ready_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000)
+    readiness["ready"] = True
+    print(f"✅ Backend ready: startup {(time.perf_counter() - started) * 1000:.0f}ms, import {readiness['import_ms']}ms, time-to-ready {readiness['time_to_ready_ms']}ms")
+    yield
+    readiness["ready"] = False
+    transcript_writer.stop()
+    analytics.stop()
+    client.close()
+
 # Initialize FastAPI app
-app = FastAPI(title="Interview Chatbot API", version="1.0.0")
+app = FastAPI(title="Interview Chatbot API", version="1.0.0", lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -25,13 +98,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# ✅ Connect to MongoDB - Use environment variable for production
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-client = MongoClient(MONGO_URI)
-
-db = client["interview_chatbot"]
-candidates_collection = db["candidates"]
-
 # Candidate Registration Model
 class CandidateRegister(BaseModel):
     name: str
@@ -56,6 +122,9 @@ class LoginRequest(BaseModel):
     email: str
     password: str
 
+# Number of most recent transcript entries returned by /bootstrap
+BOOTSTRAP_HISTORY_LIMIT = int(os.getenv("BOOTSTRAP_HISTORY_LIMIT", "50"))
+
 # Root EndpointS
 @app.get("/")
 def read_root():
@@ -64,10 +133,6 @@ def read_root():
 @app.post("/register")
 def register_candidate(candidate: CandidateRegister):
     """Registers a new candidate and prompts for tech stack."""
-    existing_candidate = candidates_collection.find_one({"email": candidate.email})
-    if existing_candidate:
-        raise HTTPException(status_code=400, detail="Email already registered.")
-
     new_candidate = {
         "name": candidate.name,
         "email": candidate.email,
@@ -76,7 +141,14 @@ def register_candidate(candidate: CandidateRegister):
         "tech_stack": [],
         "chat_history": []  # Initialize empty chat history array
     }
-    result = candidates_collection.insert_one(new_candidate)
+    # Archived interviews keep their email - it comes back on rehydration
+    if archive.is_archived(candidate.email):
+        raise HTTPException(status_code=400, detail="Email already registered.")
+    # The unique email index makes this atomic - no check-then-insert race
+    try:
+        result = candidates_collection.insert_one(new_candidate)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Email already registered.")
     return {
     "message": "Registered successfully!",
     "candidate_id": str(result.inserted_id),
@@ -87,10 +159,15 @@ def register_candidate(candidate: CandidateRegister):
 def login_user(credentials: LoginRequest):
     """Logs in a candidate by validating email and password."""
     user = candidates_collection.find_one({"email": credentials.email})
+    if not user:
+        # Idle interviews live in the archive until their candidate comes back - only restored for the right credentials
+        user = archive.rehydrate(candidates_collection, email=credentials.email, name=credentials.name, password=credentials.password)
+        if not user and archive.is_archived(credentials.email):
+            raise HTTPException(status_code=401, detail="Incorrect password or name.")
     if not user:
         raise HTTPException(status_code=404, detail="User not found.")
 
-    if user["password"] != credentials.password or user["name"].strip().lower() != credentials.name.strip().lower():
+    if not archive.credentials_match(user, credentials.name, credentials.password):
         raise HTTPException(status_code=401, detail="Incorrect password or name.")
 
     return {
@@ -99,6 +176,94 @@ def login_user(credentials: LoginRequest):
         "email": user["email"]
     }
 
+@app.post("/bootstrap")
+def bootstrap_session(credentials: LoginRequest, history_limit: int = BOOTSTRAP_HISTORY_LIMIT):
+    """Log in and return everything the chat page needs - profile, tech stack, interview phase and recent history - in one round trip."""
+    # One projected read: the transcript is sliced server-side instead of loading the whole document.
+    # One extra entry is read so has_more tells the client whether to page the rest from /history.
+    history_limit = max(history_limit, 1)
+    projection = {
+        "name": 1, "email": 1, "password": 1, "status": 1, "tech_stack": 1,
+        "experience": 1, "interested_roles": 1,
+        "chat_history": {"$slice": -(history_limit + 1)}
+    }
+    user = candidates_collection.find_one({"email": credentials.email}, projection)
+    if not user:
+        # Idle interviews live in the archive until their candidate comes back - only restored for the right credentials
+        if archive.rehydrate(candidates_collection, email=credentials.email, name=credentials.name, password=credentials.password):
+            user = candidates_collection.find_one({"email": credentials.email}, projection)
+        elif archive.is_archived(credentials.email):
+            raise HTTPException(status_code=401, detail="Incorrect password or name.")
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    if not archive.credentials_match(user, credentials.name, credentials.password):
+        raise HTTPException(status_code=401, detail="Incorrect password or name.")
+
+    candidate_id = str(user["_id"])
+    chat_history = user.get("chat_history", [])
+    try:
+        flushed = transcript_writer.flush_candidate(candidate_id)
+    except TranscriptFlushError as e:
+        # Login still works - the latest exchanges just aren't in the transcript yet
+        print(f"⚠️ {e}")
+        flushed = 0
+    if flushed:
+        # Entries were still queued for this candidate - they are newer than anything read above
+        chat_history = (candidates_collection.find_one({"_id": user["_id"]}, {"chat_history": {"$slice": -(history_limit + 1)}}) or {}).get("chat_history", [])
+    has_more = len(chat_history) > history_limit
+    chat_history = chat_history[-history_limit:]
+    try:
+        interview = interview_service.get_phase(candidate_id)
+    except Exception as e:
+        print(f"⚠️ Could not read interview phase for {candidate_id}: {e}")
+        interview = {"phase": "started" if chat_history else "not_started"}
+
+    return {
+        "candidate_id": candidate_id,
+        "name": user["name"],
+        "email": user["email"],
+        "status": user.get("status"),
+        "tech_stack": user.get("tech_stack", []),
+        "experience": user.get("experience", {"years": 0, "months": 0}),
+        "interested_roles": user.get("interested_roles", []),
+        "interview": interview,
+        "chat_history": chat_history,
+        "has_more": has_more
+    }
+
+def record_interview_start(candidate_id: str, obj_id: ObjectId, candidate: dict, greeting: str) -> str:
+    """Persist Rick's greeting to the transcript and analytics; returns the cleaned greeting."""
+    # Store in chat history - remove any "Rick: " prefix if it exists
+    if greeting.startswith("Rick: "):
+        greeting = greeting[6:]
+    transcript_writer.append(candidate_id, obj_id, {
+        "user": "START_INTERVIEW",
+        "bot": greeting,
+        "timestamp": datetime.utcnow()
+    })
+    analytics.record_interview_started(candidate)
+    return greeting
+
+def record_turn(candidate_id: str, obj_id: ObjectId, candidate: dict, message: str, rick_response: str) -> str:
+    """Persist one exchange to the transcript and analytics; returns the cleaned response."""
+    # Remove "Rick: " prefix if it exists
+    if rick_response.startswith("Rick: "):
+        rick_response = rick_response[6:]
+    # Store in candidate's chat history array (queued when write-behind is on - graph state is already checkpointed)
+    entry = {
+        "user": message,
+        "bot": rick_response,
+        "timestamp": datetime.utcnow()
+    }
+    # The evaluator's verdict travels with the turn so analytics can be rebuilt from transcripts
+    evaluation = interview_service.last_turn(candidate_id).get("evaluation")
+    if evaluation:
+        entry["evaluation"] = evaluation
+    transcript_writer.append(candidate_id, obj_id, entry)
+    analytics.record_turn(candidate, evaluation)
+    return rick_response
+
 @app.post("/start_interview/{candidate_id}")
 def start_interview(candidate_id: str):
     """Start a Rick interview session."""
@@ -107,7 +272,7 @@ def start_interview(candidate_id: str):
     except:
         raise HTTPException(status_code=400, detail="Invalid candidate ID format.")
 
-    candidate = candidates_collection.find_one({"_id": obj_id})
+    candidate = profile_cache.get(candidates_collection, candidate_id, obj_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found.")
     
@@ -123,32 +288,27 @@ def start_interview(candidate_id: str):
         interested_roles=candidate.get("interested_roles", [])
     )
     
-    # Store in chat history - remove any "Rick: " prefix if it exists
-    if greeting.startswith("Rick: "):
-        greeting = greeting[6:]
-    
-    # Add to candidate's chat_history array
-    from datetime import datetime
-    candidates_collection.update_one(
-        {"_id": obj_id},
-        {"$push": {"chat_history": {
-            "user": "START_INTERVIEW",
-            "bot": greeting,
-            "timestamp": datetime.utcnow()
-        }}}
-    )
-    
-    return {"response": greeting}
+    return {"response": record_interview_start(candidate_id, obj_id, candidate, greeting)}
     
 @app.post("/chat/{candidate_id}")
-def chat(candidate_id: str, request: ChatRequest):
+def chat(candidate_id: str, request: ChatRequest, response: Response, x_profile: str = Header(None)):
     """Chat with Rick while linking conversation to a candidate."""
+    # Opt-in profiling (admin header or sampling); otherwise the turn runs untouched
+    if profiling.should_profile(x_profile):
+        result, profile_id = profiling.run_profiled(f"/chat/{candidate_id}", chat_turn, candidate_id, request)
+        response.headers["X-Profile-ID"] = profile_id
+        return result
+    return chat_turn(candidate_id, request)
+
+def chat_turn(candidate_id: str, request: ChatRequest) -> dict:
+    """One /chat turn: resolve the candidate, run the graph and record the exchange."""
     try:
         obj_id = ObjectId(candidate_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid candidate ID format.")
 
-    candidate = candidates_collection.find_one({"_id": obj_id})
+    # Steady-state turns are served from the profile cache - no candidate read
+    candidate = profile_cache.get(candidates_collection, candidate_id, obj_id)
     if not candidate:
         raise HTTPException(status_code=404, detail="Candidate not found.")
 
@@ -165,22 +325,7 @@ def chat(candidate_id: str, request: ChatRequest):
             message=request.message
         )
         
-        # Remove "Rick: " prefix if it exists
-        if rick_response.startswith("Rick: "):
-            rick_response = rick_response[6:]
-        
-        # Store in candidate's chat history array
-        from datetime import datetime
-        candidates_collection.update_one(
-            {"_id": obj_id},
-            {"$push": {"chat_history": {
-                "user": request.message,
-                "bot": rick_response,
-                "timestamp": datetime.utcnow()
-            }}}
-        )
-        
-        return {"response": rick_response}
+        return {"response": record_turn(candidate_id, obj_id, candidate, request.message, rick_response)}
     
     except ValueError as e:
         # Interview not started yet, start it
@@ -197,6 +342,144 @@ def chat(candidate_id: str, request: ChatRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# WebSocket interview channel
+WS_HEARTBEAT_SECONDS = float(os.getenv("WS_HEARTBEAT_SECONDS", "20"))
+WS_RESUME_LIMIT = int(os.getenv("WS_RESUME_LIMIT", "200"))
+# Graph nodes -> progress stages pushed to the client while a turn runs
+PROGRESS_STAGES = {
+    "GreetCandidate": "greeting",
+    "GreetingResponse": "reading_reply",
+    "Evaluator": "evaluating",
+    "FollowUpCheck": "considering_follow_up",
+    "FallbackAgent": "regrouping",
+    "RickAgent": "asking_question",
+}
+
+def transcript_since(obj_id: ObjectId, last_seq: int) -> tuple:
+    """(transcript length, entries after position last_seq) in one aggregation - used to resume a reconnecting socket."""
+    docs = list(candidates_collection.aggregate([
+        {"$match": {"_id": obj_id}},
+        {"$project": {
+            "count": {"$size": {"$ifNull": ["$chat_history", []]}},
+            "missed": {"$slice": [{"$ifNull": ["$chat_history", []]}, max(last_seq, 0), WS_RESUME_LIMIT]}
+        }}
+    ]))
+    if not docs:
+        return 0, []
+    return docs[0]["count"], docs[0]["missed"]
+
+@app.websocket("/ws/interview/{candidate_id}")
+async def interview_socket(websocket: WebSocket, candidate_id: str, last_seq: int = None):
+    """Interview session over one WebSocket - the candidate and graph state are loaded once and kept hot for the connection.
+
+    Client -> server: {"type": "message", "text": ...} or {"type": "ping"}.
+    The hot state is checked against the latest checkpoint before each turn and reloaded if the candidate took a turn
+    over HTTP /chat (or another socket) in the meantime.
+    Server -> client: "ready", "history" (entries missed since ?last_seq= on reconnect), "typing", "progress",
+    "reply", "heartbeat", "pong" and "error" events. seq is the transcript position of an exchange.
+    """
+    await websocket.accept()
+    try:
+        obj_id = ObjectId(candidate_id)
+    except:
+        await websocket.close(code=1008, reason="Invalid candidate ID format.")
+        return
+    candidate = await run_in_threadpool(profile_cache.get, candidates_collection, candidate_id, obj_id)
+    if not candidate or not candidate.get("tech_stack"):
+        await websocket.close(code=1008, reason="Candidate not found or tech stack missing.")
+        return
+
+    send_lock = asyncio.Lock()
+
+    async def send(event: dict):
+        async with send_lock:
+            await websocket.send_json(event)
+
+    async def heartbeat():
+        while True:
+            await asyncio.sleep(WS_HEARTBEAT_SECONDS)
+            await send({"type": "heartbeat"})
+
+    def progress(node: str):
+        # Called from the worker thread running the graph
+        if node in PROGRESS_STAGES:
+            from_thread.run(send, {"type": "progress", "stage": PROGRESS_STAGES[node]})
+
+    beat = None
+    try:
+        # Graph state is loaded once here; every message after this is just a graph step
+        values = await run_in_threadpool(interview_service.open_session, candidate_id)
+        greeting = None
+        if not values:
+            await send({"type": "typing"})
+            greeting = await run_in_threadpool(
+                interview_service.start_interview,
+                candidate_id,
+                candidate["name"],
+                candidate["tech_stack"],
+                candidate.get("experience", {"years": 0, "months": 0}),
+                candidate.get("interested_roles", [])
+            )
+            greeting = await run_in_threadpool(record_interview_start, candidate_id, obj_id, candidate, greeting)
+            values = await run_in_threadpool(interview_service.get_state_values, candidate_id)
+        version = await run_in_threadpool(interview_service.checkpoint_version, candidate_id)
+
+        # Read-your-writes, then replay whatever a reconnecting client missed
+        try:
+            await run_in_threadpool(transcript_writer.flush_candidate, candidate_id)
+        except TranscriptFlushError as e:
+            await send({"type": "error", "detail": str(e)})
+        seq, missed = await run_in_threadpool(transcript_since, obj_id, last_seq or 0)
+        await send({"type": "ready", "seq": seq, "phase": "interviewing" if values.get("ready_to_start") else "greeting"})
+        if last_seq is not None:
+            for offset, entry in enumerate(missed):
+                await send({"type": "history", "seq": last_seq + offset + 1, "user": entry.get("user"), "bot": entry.get("bot")})
+        elif greeting is not None:
+            await send({"type": "reply", "seq": seq, "text": greeting})
+
+        beat = asyncio.create_task(heartbeat())
+        while True:
+            try:
+                event = json.loads(await websocket.receive_text())
+            except json.JSONDecodeError:
+                event = None
+            if not isinstance(event, dict):
+                await send({"type": "error", "detail": "Messages must be JSON objects."})
+                continue
+            if event.get("type") == "ping":
+                await send({"type": "pong"})
+                continue
+            message = str(event.get("text", "")).strip() if event.get("type") == "message" else ""
+            if not message:
+                await send({"type": "error", "detail": 'Expected a "message" event with non-empty "text".'})
+                continue
+
+            await send({"type": "typing"})
+            try:
+                # Someone else moved the interview on - never step (and overwrite the checkpoint) from stale state
+                if await run_in_threadpool(interview_service.checkpoint_version, candidate_id) != version:
+                    values = await run_in_threadpool(interview_service.get_state_values, candidate_id)
+                    # Those turns also added transcript entries - keep seq in step with the stored transcript
+                    await run_in_threadpool(transcript_writer.flush_candidate, candidate_id)
+                    seq, _ = await run_in_threadpool(transcript_since, obj_id, seq)
+                values = await run_in_threadpool(interview_service.run_turn, candidate_id, values, message, progress)
+                reply = values.get("last_response", "I'm having trouble processing that.")
+                reply = await run_in_threadpool(record_turn, candidate_id, obj_id, candidate, message, reply)
+            except Exception as e:
+                # Nodes mutate state in place - reload the last checkpoint rather than trust the hot copy
+                values = await run_in_threadpool(interview_service.get_state_values, candidate_id)
+                version = await run_in_threadpool(interview_service.checkpoint_version, candidate_id)
+                await send({"type": "error", "detail": str(e)})
+                continue
+            version = await run_in_threadpool(interview_service.checkpoint_version, candidate_id)
+            seq += 1
+            await send({"type": "reply", "seq": seq, "text": reply})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        if beat is not None:
+            beat.cancel()
+
 @app.post("/end_interview/{candidate_id}")
 def end_interview(candidate_id: str):
     """End the Rick interview session and delete user from database."""
@@ -204,11 +487,14 @@ def end_interview(candidate_id: str):
         # Convert candidate_id to ObjectId
         obj_id = ObjectId(candidate_id)
         
-        # End the interview service session
+        # End the interview service session and drop its checkpoints - nothing else would ever clean them up
         interview_service.end_interview(candidate_id)
+        interview_service.delete_state(candidate_id)
         
         # Delete candidate from candidates collection (chat history is embedded, so this deletes everything)
+        transcript_writer.discard(candidate_id)
         candidate_result = candidates_collection.delete_one({"_id": obj_id})
+        profile_cache.invalidate(candidate_id)
         
         return {
             "message": "Interview ended and user data deleted successfully",
@@ -224,11 +510,7 @@ def update_full_details(candidate_id: str, update: CandidateDetailsUpdate):
     except:
         raise HTTPException(status_code=400, detail="Invalid candidate ID format.")
 
-    candidate = candidates_collection.find_one({"_id": obj_id})
-    if not candidate:
-        raise HTTPException(status_code=404, detail="Candidate not found.")
-
-    candidates_collection.update_one(
+    result = candidates_collection.update_one(
         {"_id": obj_id},
         {"$set": {
             "tech_stack": update.tech_stack,
@@ -237,11 +519,19 @@ def update_full_details(candidate_id: str, update: CandidateDetailsUpdate):
             "status": "registered"
         }}
     )
+    profile_cache.invalidate(candidate_id)
+    if result.matched_count == 0:
+        raise HTTPException(status_code=404, detail="Candidate not found.")
     return {"message": "Candidate details updated successfully!"}
 
 @app.get("/history/{candidate_id}")
 def get_chat_history(candidate_id: str):
     """Fetch chat history for a candidate."""
+    try:
+        # Read-your-writes: queued transcript entries land before the read
+        transcript_writer.flush_candidate(candidate_id)
+    except TranscriptFlushError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     try:
         obj_id = ObjectId(candidate_id)
         candidate = candidates_collection.find_one({"_id": obj_id}, {"chat_history": 1, "_id": 0})
@@ -258,16 +548,128 @@ def get_tech_stack(candidate_id: str):
     """Fetch tech stack of a candidate."""
     try:
         obj_id = ObjectId(candidate_id)
-        candidate = candidates_collection.find_one({"_id": obj_id})
+        candidate = profile_cache.get(candidates_collection, candidate_id, obj_id)
         if not candidate:
             raise HTTPException(status_code=404, detail="Candidate not found.")
         return {"tech_stack": candidate.get("tech_stack", [])}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.on_event("startup")
-async def startup_event():
-    pass
+@app.get("/scorecard/{candidate_id}")
+def get_scorecard(candidate_id: str):
+    """Recruiter scorecard for a candidate, maintained incrementally during the interview."""
+    try:
+        return interview_service.get_scorecard(candidate_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def require_admin(token: str) -> None:
+    """Admin endpoints share the profiling admin token; with it unset they are disabled."""
+    if not profiling.PROFILING_ADMIN_TOKEN or token != profiling.PROFILING_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="This endpoint requires the admin X-Admin-Token header.")
+
+@app.post("/archive/{candidate_id}")
+def archive_interview(candidate_id: str, x_admin_token: str = Header(None)):
+    """Move an interview out of the hot collections into the compressed archive (restored on the candidate's next login)."""
+    require_admin(x_admin_token)
+    try:
+        ObjectId(candidate_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid candidate ID format.")
+    try:
+        archived = archive.archive_candidate(candidates_collection, candidate_id)
+    except TranscriptFlushError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not archived:
+        raise HTTPException(status_code=404, detail="Candidate not found.")
+    return {"message": "Interview archived", "candidate_id": candidate_id}
+
+@app.post("/rehydrate/{candidate_id}")
+def rehydrate_interview(candidate_id: str, x_admin_token: str = Header(None)):
+    """Bring an archived interview back into the hot collections."""
+    require_admin(x_admin_token)
+    try:
+        ObjectId(candidate_id)
+    except:
+        raise HTTPException(status_code=400, detail="Invalid candidate ID format.")
+    if not archive.rehydrate(candidates_collection, candidate_id=candidate_id):
+        raise HTTPException(status_code=404, detail="Interview not found in the archive.")
+    return {"message": "Interview restored", "candidate_id": candidate_id}
+
+@app.get("/export")
+def export_interviews(compression: str = "gzip", batch_size: int = interview_transfer.TRANSFER_BATCH_SIZE, include_state: bool = True, x_admin_token: str = Header(None)):
+    """Stream every interview (candidate, transcript, LangGraph state) as NDJSON over a server-side cursor.
+
+    Passwords are never exported over HTTP - use the CLI's --include-credentials for a full move.
+    """
+    require_admin(x_admin_token)
+    if compression not in interview_transfer.COMPRESSIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown compression '{compression}'.")
+    # Queued transcript entries belong in the export
+    transcript_writer.flush()
+    suffix = {"gzip": ".gz", "zstd": ".zst"}.get(compression, "")
+    return StreamingResponse(
+        interview_transfer.iter_export(candidates_collection, max(batch_size, 1), compression, include_state),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="interviews.ndjson{suffix}"'}
+    )
+
+@app.post("/import")
+def import_interviews(file: UploadFile = File(...), compression: str = None, batch_size: int = interview_transfer.TRANSFER_BATCH_SIZE, include_state: bool = True, x_admin_token: str = Header(None)):
+    """Load an /export file; uploads are spooled to disk, and documents are written batch by batch with ordered bulk_writes."""
+    require_admin(x_admin_token)
+    try:
+        counts = interview_transfer.import_stream(
+            candidates_collection,
+            file.file,
+            max(batch_size, 1),
+            compression or interview_transfer.compression_for(file.filename or ""),
+            include_state
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except interview_transfer.PartialImportError as e:
+        profile_cache.clear()
+        raise HTTPException(status_code=409, detail={"message": str(e), "applied": e.counts})
+    # Imported candidates may replace cached profiles
+    profile_cache.clear()
+    return {"message": "Import finished", **counts}
+
+@app.get("/analytics")
+def get_analytics(dimension: str = "all", days: int = 30):
+    """Recruiter dashboard data from the precomputed rollups (dimension: all, tech or role)."""
+    try:
+        return analytics.dashboard(dimension, max(days, 1))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/profiles/{profile_id}")
+def get_profile(profile_id: str, x_profile: str = Header(None), raw: bool = False):
+    """A stored request profile (top functions and call tree); raw=true returns the pstats file for snakeviz."""
+    if not profiling.PROFILING_ADMIN_TOKEN or x_profile != profiling.PROFILING_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Profiles require the admin X-Profile header.")
+    profile = profiling.get_profile(profile_id, include_raw=raw)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    if raw:
+        return Response(content=bytes(profile["pstats"]), media_type="application/octet-stream", headers={"Content-Disposition": f'attachment; filename="{profile_id}.pstats"'})
+    return profile
+
+@app.get("/llm_status")
+def get_llm_status():
+    """Expose the LLM circuit breaker state (closed / open / half_open)."""
+    return {"circuit_breaker": llm_breaker.snapshot(), "profile_cache": profile_cache.stats()}
+
+@app.get("/ready")
+def ready():
+    """Readiness probe - 200 only once Mongo, the graph and the OpenAI pool are warmed up."""
+    if not readiness["ready"]:
+        raise HTTPException(status_code=503, detail="Starting up.")
+    return readiness
+
+readiness["import_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,47 @@
+import os
+import threading
+from typing import List
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from pymongo.errors import BulkWriteError
+
+# Load environment variables
+load_dotenv()
+MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
+APP_DB_NAME = "interview_chatbot"
+
+# One MongoClient (and pool) per process: the API binds its lifespan client, CLI tools connect on first use
+_client = None
+_lock = threading.Lock()
+
+
+def bind(mongo_client: MongoClient) -> None:
+    """Use an existing MongoClient (e.g. the API's) for every collection instead of opening a separate pool."""
+    global _client
+    _client = mongo_client
+
+
+def get_client() -> MongoClient:
+    """The bound MongoClient, connecting on first use."""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = MongoClient(MONGO_URI)
+    return _client
+
+
+def collection(name: str, db_name: str = APP_DB_NAME):
+    """A collection of the app database on the shared client."""
+    return get_client()[db_name][name]
+
+
+def insert_new(target, docs: List[dict]) -> int:
+    """insert_many that skips documents a unique index already holds (e.g. from a previous batch run); returns how many went in."""
+    if not docs:
+        return 0
+    try:
+        return len(target.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        # Duplicates are expected - count what did go in
+        return e.details.get("nInserted", 0)
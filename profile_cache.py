@@ -0,0 +1,70 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "300"))
+PROFILE_CACHE_MAX_ENTRIES = int(os.getenv("PROFILE_CACHE_MAX_ENTRIES", "10000"))
+
+# Only what the chat hot path needs - never the transcript or the password
+PROFILE_PROJECTION = {"name": 1, "email": 1, "status": 1, "tech_stack": 1, "experience": 1, "interested_roles": 1}
+
+
+class ProfileCache:
+    """In-process TTL + LRU cache of candidate profiles, filled by projected reads."""
+
+    def __init__(self, ttl_seconds: float = PROFILE_CACHE_TTL_SECONDS, max_entries: int = PROFILE_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        # candidate_id -> invalidation count; a read that raced an invalidate() isn't stored. Bounded like entries.
+        self.generations = OrderedDict()
+        self.clears = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, collection, candidate_id: str, obj_id) -> Optional[dict]:
+        """Cached profile for the candidate, reading (projected) from Mongo on a miss; None if not found."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(candidate_id)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(candidate_id)
+                self.hits += 1
+                return entry[1]
+            generation = (self.generations.get(candidate_id, 0), self.clears)
+
+        profile = collection.find_one({"_id": obj_id}, PROFILE_PROJECTION)
+        with self.lock:
+            self.misses += 1
+            # Invalidated while we were reading - the profile may predate the change, so serve it but don't cache it
+            if profile is not None and (self.generations.get(candidate_id, 0), self.clears) == generation:
+                self.entries[candidate_id] = (now + self.ttl_seconds, profile)
+                self.entries.move_to_end(candidate_id)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return profile
+
+    def invalidate(self, candidate_id: str) -> None:
+        """Drop the candidate's entry - call after anything that changes or deletes their profile."""
+        with self.lock:
+            self.entries.pop(candidate_id, None)
+            self.generations[candidate_id] = self.generations.get(candidate_id, 0) + 1
+            self.generations.move_to_end(candidate_id)
+            while len(self.generations) > self.max_entries:
+                self.generations.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry - after bulk changes such as an import."""
+        with self.lock:
+            self.entries.clear()
+            self.clears += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+profile_cache = ProfileCache()
@@ -0,0 +1,89 @@
+import io
+import os
+import time
+import uuid
+import random
+import marshal
+import cProfile
+import pstats
+from datetime import datetime
+from typing import Optional
+from bson import Binary
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+import mongo
+
+# Load environment variables
+load_dotenv()
+# Requests carrying "X-Profile: <token>" are profiled; unset disables the header entirely
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN", "")
+# Fraction of /chat requests profiled without the header (0 = only on demand)
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_RETENTION_HOURS = int(os.getenv("PROFILE_RETENTION_HOURS", "72"))
+PROFILE_TOP_N = 40
+PROFILE_COLLECTION = "request_profiles"
+
+PROFILE_INDEXES = [
+    ([("created_at", ASCENDING)], {"name": "profile_ttl", "expireAfterSeconds": PROFILE_RETENTION_HOURS * 3600}),
+]
+
+
+def should_profile(header_value: Optional[str]) -> bool:
+    """Whether to profile this request - two comparisons when profiling is off."""
+    if header_value and PROFILING_ADMIN_TOKEN and header_value == PROFILING_ADMIN_TOKEN:
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def _summary(profiler: cProfile.Profile) -> tuple:
+    """(top functions by cumulative time, printable call tree) for a finished profile."""
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream).sort_stats("cumulative")
+    stats.print_stats(PROFILE_TOP_N)
+    stats.print_callees(PROFILE_TOP_N)
+    top = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_N]:
+        top.append({
+            "function": f"{os.path.basename(filename)}:{line}({function})",
+            "calls": ncalls,
+            "self_ms": round(tottime * 1000, 2),
+            "cumulative_ms": round(cumtime * 1000, 2),
+        })
+    return top, stream.getvalue()
+
+
+def run_profiled(label: str, fn, *args, **kwargs) -> tuple:
+    """Run fn under cProfile and store the profile; returns (result, profile_id).
+
+    The profile covers the calling thread - graph nodes run inline there, so node, Mongo and OpenAI time
+    show up in the call tree (hedged OpenAI calls appear as time spent waiting on their futures).
+    """
+    profile_id = uuid.uuid4().hex
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        return fn(*args, **kwargs), profile_id
+    finally:
+        profiler.disable()
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        try:
+            top, report = _summary(profiler)
+            mongo.collection(PROFILE_COLLECTION).insert_one({
+                "_id": profile_id,
+                "label": label,
+                "created_at": datetime.utcnow(),
+                "duration_ms": duration_ms,
+                "top": top,
+                "report": report,
+                # Raw pstats data - load with pstats / snakeviz for the full call graph
+                "pstats": Binary(marshal.dumps(profiler.stats)),
+            })
+            print(f"🔬 Profiled {label} in {duration_ms}ms -> /profiles/{profile_id}")
+        except Exception as e:
+            print(f"⚠️ Could not store profile for {label}: {e}")
+
+
+def get_profile(profile_id: str, include_raw: bool = False) -> Optional[dict]:
+    projection = None if include_raw else {"pstats": 0}
+    return mongo.collection(PROFILE_COLLECTION).find_one({"_id": profile_id}, projection)
@@ -0,0 +1,133 @@
+import os
+import json
+import argparse
+import itertools
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+from llm_client import chat_completion
+import mongo
+
+# Load environment variables
+load_dotenv()
+QUESTION_BANK_ENABLED = os.getenv("QUESTION_BANK_ENABLED", "true").lower() == "true"
+
+# Combinations the batch pipeline pre-generates questions for
+COMMON_TECHNOLOGIES = [
+    "Python", "JavaScript", "TypeScript", "React", "Node.js", "Java", "SQL", "MongoDB",
+    "AWS", "Docker", "Kubernetes", "Django", "FastAPI", "Git", "PostgreSQL", "Machine Learning",
+]
+ROLES = [
+    "Frontend Developer", "Backend Developer", "Full Stack Developer",
+    "DevOps Engineer", "Machine Learning Engineer"
+]
+EXPERIENCE_BANDS = ["junior", "mid", "senior"]
+QUESTIONS_PER_COMBINATION = int(os.getenv("QUESTION_BANK_PER_COMBINATION", "5"))
+QUESTION_BANK_COLLECTION = "question_bank"
+
+
+def ensure_indexes(collection=None) -> None:
+    """Compound lookup index plus a uniqueness guard so re-running the pipeline doesn't duplicate questions."""
+    collection = collection if collection is not None else mongo.collection(QUESTION_BANK_COLLECTION)
+    collection.create_index([("technology", ASCENDING), ("role", ASCENDING), ("experience_band", ASCENDING)], name="bank_lookup")
+    collection.create_index([("technology", ASCENDING), ("role", ASCENDING), ("experience_band", ASCENDING), ("question", ASCENDING)], unique=True, name="bank_unique_question")
+
+
+def experience_band(experience: dict) -> str:
+    """Bucket years/months of experience into the bands the bank is indexed by."""
+    total_years = experience.get("years", 0) + experience.get("months", 0) / 12
+    if total_years < 2:
+        return "junior"
+    if total_years < 5:
+        return "mid"
+    return "senior"
+
+
+def generate_batch(technology: str, role: str, band: str, count: int = QUESTIONS_PER_COMBINATION) -> List[str]:
+    """Generate several distinct Rick-style questions for one technology / role / band combination."""
+    prompt = f"""You are Rick Sanchez from Rick and Morty, preparing technical interview questions.
+    Generate {count} distinct, challenging but fair technical questions.
+    - Technology: {technology}
+    - Role: {role}
+    - Experience level: {band}
+    Make each sound like Rick - use his characteristic sarcasm and scientific jargon.
+    Each question should explore a different aspect of the technology and be under 2 sentences.
+    Respond with ONLY a JSON array of strings."""
+
+    answer = chat_completion([{"role": "user", "content": prompt}], temperature=0.8, kind="question_bank")
+    start, end = answer.find("["), answer.rfind("]")
+    if start == -1 or end == -1:
+        return []
+    questions = json.loads(answer[start:end + 1])
+    return [question.strip() for question in questions if isinstance(question, str) and question.strip()]
+
+
+def build_bank(technologies: List[str] = None, roles: List[str] = None, bands: List[str] = None, workers: int = 8, per_combination: int = QUESTIONS_PER_COMBINATION) -> int:
+    """Pre-generate questions for every combination in parallel workers and store them; returns the number inserted."""
+    collection = mongo.collection(QUESTION_BANK_COLLECTION)
+    ensure_indexes(collection)
+    combinations = list(itertools.product(technologies or COMMON_TECHNOLOGIES, roles or ROLES, bands or EXPERIENCE_BANDS))
+    print(f"🏦 Building question bank: {len(combinations)} combinations, {workers} workers")
+
+    inserted = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(generate_batch, tech, role, band, per_combination): (tech, role, band) for tech, role, band in combinations}
+        for future in as_completed(futures):
+            tech, role, band = futures[future]
+            try:
+                questions = future.result()
+            except Exception as e:
+                print(f"   ❌ {tech} / {role} / {band}: {e}")
+                continue
+            if not questions:
+                continue
+            docs = [{
+                "technology": tech.lower(),
+                "role": role,
+                "experience_band": band,
+                "question": question,
+                "created_at": datetime.utcnow()
+            } for question in questions]
+            inserted += mongo.insert_new(collection, docs)
+            print(f"   ✅ {tech} / {role} / {band}: {len(questions)} questions")
+    print(f"🏦 Question bank build finished, {inserted} new questions")
+    return inserted
+
+
+def draw_question(tech_stack: List[str], interested_roles: List[str], experience: dict, exclude: List[str] = None, question_index: int = 0) -> Optional[str]:
+    """Draw a random unasked question for the candidate from the bank; None when the stack isn't covered.
+
+    One indexed $sample for the rotated technology; a second one over the whole stack runs only when the first comes back empty.
+    """
+    if not QUESTION_BANK_ENABLED or not tech_stack:
+        return None
+    stack = [tech.lower() for tech in tech_stack]
+    # Rotate the technology so consecutive questions cover the whole stack
+    technology = stack[question_index % len(stack)]
+    match = {
+        "technology": technology,
+        "experience_band": experience_band(experience),
+        "question": {"$nin": exclude or []},
+    }
+    if interested_roles:
+        match["role"] = {"$in": interested_roles}
+
+    collection = mongo.collection(QUESTION_BANK_COLLECTION)
+    # The whole-stack fallback query is only issued when the rotated technology has nothing left
+    for candidate_match in (match, {**match, "technology": {"$in": stack}}):
+        docs = list(collection.aggregate([{"$match": candidate_match}, {"$sample": {"size": 1}}]))
+        if docs:
+            return docs[0]["question"]
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate Rick-style interview questions into MongoDB.")
+    parser.add_argument("--workers", type=int, default=8, help="Parallel generation workers")
+    parser.add_argument("--per-combination", type=int, default=QUESTIONS_PER_COMBINATION, help="Questions per technology/role/band")
+    parser.add_argument("--technologies", nargs="*", help="Override the technology list")
+    parser.add_argument("--roles", nargs="*", help="Override the role list")
+    args = parser.parse_args()
+    build_bank(technologies=args.technologies, roles=args.roles, workers=args.workers, per_combination=args.per_combination)
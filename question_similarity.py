@@ -0,0 +1,81 @@
+import os
+import re
+import zlib
+from typing import List, Optional, Tuple
+
+# Similarity above which a new question counts as a repeat of one already asked
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("QUESTION_DUPLICATE_THRESHOLD", "0.5"))
+# Below this many shingles a question is too short for the overlap coefficient - it would be "contained" in
+# any longer question on the same topic - so it is compared with Jaccard instead
+MIN_OVERLAP_SHINGLES = 6
+
+_TOKEN_RE = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*")
+# Common words plus Rick's verbal tics, which would otherwise make every question look alike
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "of", "to", "in", "on", "at", "for", "with", "by", "from", "as",
+    "is", "are", "was", "be", "it", "its", "this", "that", "these", "those", "you", "your", "i", "me", "my",
+    "we", "do", "does", "did", "can", "could", "would", "should", "how", "what", "why", "when", "which",
+    "explain", "tell", "describe", "walk", "through", "go", "on", "about", "like", "if", "so", "some", "just",
+    "rick", "morty", "burp", "jerry", "genius", "listen", "alright", "okay", "ok", "come", "let", "s",
+}
+
+
+def _normalize(token: str) -> str:
+    """Very light stemming so 'threads' and 'thread' shingle together."""
+    if len(token) > 4 and token.endswith("ing"):
+        return token[:-3]
+    if len(token) > 3 and token.endswith("es"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s"):
+        return token[:-1]
+    return token
+
+
+def shingles(text: str) -> frozenset:
+    """Hashed unigram + bigram shingles over the content words of a question."""
+    words = [_normalize(token) for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS]
+    grams = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+    return frozenset(zlib.crc32(gram.encode()) for gram in grams)
+
+
+def similarity(first: frozenset, second: frozenset) -> float:
+    """Overlap coefficient - robust to one question being a padded-out rewording of the other.
+
+    Falls back to Jaccard when the shorter question has fewer than MIN_OVERLAP_SHINGLES shingles.
+    """
+    if not first or not second:
+        return 0.0
+    common = len(first & second)
+    if min(len(first), len(second)) < MIN_OVERLAP_SHINGLES:
+        return common / len(first | second)
+    return common / min(len(first), len(second))
+
+
+class QuestionIndex:
+    """Per-interview index of asked questions; checks are pure set arithmetic, no LLM calls."""
+
+    def __init__(self, questions: List[str] = None, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.entries = []
+        for question in questions or []:
+            self.add(question)
+
+    def add(self, question: str) -> None:
+        self.entries.append((question, shingles(question)))
+
+    def most_similar(self, question: str) -> Tuple[float, Optional[str]]:
+        """Best (score, previously asked question) match for the given question."""
+        candidate = shingles(question)
+        best_score, best_question = 0.0, None
+        for asked, asked_shingles in self.entries:
+            score = similarity(candidate, asked_shingles)
+            if score > best_score:
+                best_score, best_question = score, asked
+        return best_score, best_question
+
+    def is_near_duplicate(self, question: str) -> bool:
+        score, match = self.most_similar(question)
+        if score >= self.threshold:
+            print(f"   ♻️ Near-duplicate question (similarity {score:.2f}) of: {match[:50]}...")
+            return True
+        return False
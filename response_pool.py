@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import random
+import argparse
+import threading
+from string import Formatter
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Optional
+from dotenv import load_dotenv
+from pymongo import ASCENDING
+from llm_client import chat_completion
+import mongo
+
+# Load environment variables
+load_dotenv()
+# Share of greetings/fallbacks served from the pool (the rest are generated live); 0 disables the pool
+RESPONSE_POOL_RATIO = float(os.getenv("RESPONSE_POOL_RATIO", "0.8"))
+POOL_REFRESH_SECONDS = float(os.getenv("RESPONSE_POOL_REFRESH_SECONDS", "600"))
+# After a failed load, try again this soon rather than waiting a full refresh period
+POOL_RETRY_SECONDS = 30
+TEMPLATES_PER_KIND = int(os.getenv("RESPONSE_POOL_PER_KIND", "40"))
+POOL_COLLECTION = "response_pool"
+
+SLOTS = {"name", "tech", "topic", "question"}
+# Slots a template of the kind must contain - guidance is only useful if it points back at the actual question
+REQUIRED_SLOTS = {"guidance": {"name", "question"}}
+# What each kind of line is for - drives batch generation
+KINDS = {
+    "greeting": "Open a technical interview: address the candidate as {name}, say Rick Sanchez is running their interview, mention {tech}, and ask if they're ready to start. Include a *burp*.",
+    "follow_up_greeting": "The candidate {name} hasn't said they're ready yet: acknowledge that and ask again if they're ready to start the interview.",
+    "guidance": "The candidate {name} went off track: say so and steer them back by repeating the current question, {question}, encouraging but sarcastic. If they want to quit, tell them to use 'Interview Controls'.",
+    "personalized": "The candidate {name} gave another poor answer about {topic}: frustrated, a bit vulgar, demand a real answer or tell them to use 'Interview Controls' to end it.",
+}
+POOL_INDEXES = [
+    ([("kind", ASCENDING), ("template", ASCENDING)], {"name": "pool_unique_template", "unique": True}),
+]
+
+_pool = {}
+# time.monotonic() after which the in-process pool is (re)loaded; None until the first load
+_reload_at = None
+_lock = threading.Lock()
+
+
+def valid_template(template: str, kind: str = None) -> bool:
+    """Only known slots, no positional or formatted fields - so filling can never raise - and the kind's required slots."""
+    try:
+        fields = [(field, spec, conversion) for _, field, spec, conversion in Formatter().parse(template) if field is not None]
+    except ValueError:
+        return False
+    required = REQUIRED_SLOTS.get(kind, {"name"})
+    return required <= {field for field, _, _ in fields} and all(field in SLOTS and not spec and not conversion for field, spec, conversion in fields)
+
+
+def generate_batch(kind: str, count: int = TEMPLATES_PER_KIND) -> List[str]:
+    """Generate varied Rick lines for one kind, with {name} / {tech} / {topic} / {question} slots left in."""
+    required = ", ".join(f"{{{slot}}}" for slot in sorted(REQUIRED_SLOTS.get(kind, {"name"})))
+    prompt = f"""You are Rick Sanchez from Rick and Morty, writing reusable lines for a technical interview bot.
+    Purpose: {KINDS[kind]}
+    Write {count} distinct lines. Each line:
+    - keeps the placeholders literally as {{name}}, {{tech}}, {{topic}} and/or {{question}} (at least {required}), with no other braces
+    - is under 2 sentences and sounds like Rick - sarcasm, scientific jargon, the occasional *burp*
+    - differs in wording and joke from the others
+    Respond with ONLY a JSON array of strings."""
+
+    answer = chat_completion([{"role": "user", "content": prompt}], temperature=0.9, kind="response_pool")
+    start, end = answer.find("["), answer.rfind("]")
+    if start == -1 or end == -1:
+        return []
+    templates = json.loads(answer[start:end + 1])
+    return [template.strip() for template in templates if isinstance(template, str) and valid_template(template.strip(), kind)]
+
+
+def build_pool(kinds: List[str] = None, per_kind: int = TEMPLATES_PER_KIND, workers: int = 4) -> int:
+    """Generate templates for every kind in parallel and store them; returns the number inserted."""
+    collection = mongo.collection(POOL_COLLECTION)
+    for keys, options in POOL_INDEXES:
+        collection.create_index(keys, **options)
+    kinds = kinds or list(KINDS)
+    print(f"🎭 Building response pool: {len(kinds)} kinds, {per_kind} templates each")
+
+    inserted = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(generate_batch, kind, per_kind): kind for kind in kinds}
+        for future in as_completed(futures):
+            kind = futures[future]
+            try:
+                templates = future.result()
+            except Exception as e:
+                print(f"   ❌ {kind}: {e}")
+                continue
+            if not templates:
+                continue
+            docs = [{"kind": kind, "template": template, "created_at": datetime.utcnow()} for template in templates]
+            inserted += mongo.insert_new(collection, docs)
+            print(f"   ✅ {kind}: {len(templates)} templates")
+    print(f"🎭 Response pool build finished, {inserted} new templates")
+    return inserted
+
+
+def _templates(kind: str) -> List[str]:
+    """Templates for a kind from the in-process copy of the pool, reloaded every POOL_REFRESH_SECONDS.
+
+    Templates built before a kind's required slots existed (e.g. guidance without {question}) are skipped.
+    """
+    global _pool, _reload_at
+    with _lock:
+        if _reload_at is None or time.monotonic() >= _reload_at:
+            try:
+                pool = {}
+                # Sorted, so every worker sees the same order and the per-interview rotation is stable
+                for doc in mongo.collection(POOL_COLLECTION).find({}, {"kind": 1, "template": 1, "_id": 0}).sort("template", ASCENDING):
+                    if valid_template(doc["template"], doc["kind"]):
+                        pool.setdefault(doc["kind"], []).append(doc["template"])
+                _pool = pool
+                _reload_at = time.monotonic() + POOL_REFRESH_SECONDS
+            except Exception as e:
+                print(f"⚠️ Response pool unavailable, using live generation: {e}")
+                _reload_at = time.monotonic() + POOL_RETRY_SECONDS
+        return _pool.get(kind, [])
+
+
+def pooled_response(kind: str, rotation: dict, name: str, tech_stack: List[str], topic: str = "", question: str = "") -> Optional[str]:
+    """A pooled line with its slots filled, or None when this one should be generated live.
+
+    rotation is per-interview state ({"seed": ..., kind: offset}); it walks a seeded shuffle of the pool,
+    so an interview doesn't hear the same line twice until it has heard them all.
+    """
+    if RESPONSE_POOL_RATIO <= 0 or random.random() >= RESPONSE_POOL_RATIO:
+        return None
+    if "question" in REQUIRED_SLOTS.get(kind, ()) and not question:
+        return None
+    templates = _templates(kind)
+    if not templates:
+        return None
+    seed = rotation.setdefault("seed", random.randrange(1 << 30))
+    order = list(range(len(templates)))
+    random.Random(f"{seed}:{kind}").shuffle(order)
+    offset = rotation.get(kind, 0)
+    rotation[kind] = offset + 1
+    tech = ", ".join(tech_stack[:3]) or "your so-called tech stack"
+    return templates[order[offset % len(order)]].format(name=name, tech=tech, topic=topic or tech, question=question or topic or tech)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-generate Rick greeting and fallback templates into MongoDB.")
+    parser.add_argument("--per-kind", type=int, default=TEMPLATES_PER_KIND, help="Templates generated per kind")
+    parser.add_argument("--kinds", nargs="*", choices=list(KINDS), help="Only build these kinds")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel generation workers")
+    args = parser.parse_args()
+    build_pool(kinds=args.kinds, per_kind=args.per_kind, workers=args.workers)
@@ -1,21 +1,46 @@
 from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableConfig
 from typing import List, TypedDict, Literal
 import openai
 import os
+import json
+import time
+import threading
+from pymongo import MongoClient
 from dotenv import load_dotenv
 from langgraph.checkpoint.mongodb import MongoDBSaver
+from llm_client import chat_completion, classify, turn_deadline, get_client, llm_available
+from question_bank import draw_question
+from question_similarity import QuestionIndex
+from degraded_mode import local_question, heuristic_evaluation, heuristic_readiness, templated_greeting, templated_fallback
+import scorecard
+import interview_plan
+import compact_state
+import response_pool
+import mongo
+from compact_state import CompactSerializer
+from token_budget import fit_lines, clip, ANSWER_TOKEN_BUDGET
 
 
 # Load environment variables
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 
+# How hard to try for a question that isn't a near-duplicate of one already asked
+MAX_BANK_DRAWS = 3
+MAX_QUESTION_REGENERATIONS = int(os.getenv("MAX_QUESTION_REGENERATIONS", "2"))
+
+# Labels of the classification calls (and of the follow-up decision) - evaluation labels are also the Evaluator's path map keys
+EVALUATION_LABELS = scorecard.EVALUATION_LABELS
+READINESS_LABELS = ("ready", "wait")
+FOLLOWUP_LABELS = ("ask", "next")
+
 # Define the shared state for the LangGraph
 class InterviewState(TypedDict):
     current_question_index: int
     fallback_attempts: int
     questions: List[str]
-    history: List[dict] 
+    history: List[tuple]  # compact_state.history_entry tuples
     last_response: str
     candidate_name: str
     greeting_done: bool
@@ -25,8 +50,11 @@ class InterviewState(TypedDict):
     interested_roles: List[str]
     current_base_question: str
     follow_up_count: int
-    current_thread: List[dict]
+    current_thread: List[tuple]  # compact_state.thread_entry tuples
     last_evaluation: str
+    scorecard: dict
+    plan: List[dict]
+    response_rotation: dict
     _routing: str
 
 def initialize_interview(candidate_name: str, tech_stack: List[str], experience: dict, interested_roles: List[str]) -> InterviewState:
@@ -47,6 +75,9 @@ def initialize_interview(candidate_name: str, tech_stack: List[str], experience:
         "follow_up_count": 0,
         "current_thread": [],
         "last_evaluation": "",
+        "scorecard": scorecard.new_scorecard(tech_stack),
+        "plan": [],
+        "response_rotation": {},
         "_routing": ""
     }
 
@@ -77,12 +108,7 @@ def generate_rick_question(tech_stack: List[str], experience: dict, interested_r
     Ensure the new question explores different aspects than the previous questions.
     Keep the response under 2 sentences."""
     
-    response = openai.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
-    )
-    return response.choices[0].message.content.strip()
+    return chat_completion([{"role": "user", "content": prompt}], temperature=0.7, kind="question")
 
 def evaluate_answer(question: str, answer: str, tech_stack: List[str], experience: dict, interested_roles: List[str], thread_context: str = None) -> str:
     """Evaluate the candidate's answer using GPT, considering the full conversation thread."""
@@ -99,7 +125,7 @@ def evaluate_answer(question: str, answer: str, tech_stack: List[str], experienc
     
     prompt = f"""As Rick Sanchez, evaluate this technical answer:
     Last relevant question asked: {question}
-    Last user response: {answer}
+    Last user response: {clip(answer, ANSWER_TOKEN_BUDGET)}
     Full Conversation Thread(ignore if empty):{context_prompt}
     Candidate Profile:
     - Tech Stack: {', '.join(tech_stack)}
@@ -113,12 +139,9 @@ def evaluate_answer(question: str, answer: str, tech_stack: List[str], experienc
     Consider the full context of the conversation when evaluating, especially if this is a follow-up question.
     Respond with exactly one word: 'relevant', 'irrelevant', or 'gibberish'"""
     
-    response = openai.chat.completions.create(
-        model="gpt-4-turbo",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3
-    )
-    return response.choices[0].message.content.strip().lower()
+    label = classify([{"role": "user", "content": prompt}], EVALUATION_LABELS, default=None, kind="evaluation", hedge=True)
+    # Off-script answer - the local heuristic is a better guess than a fixed label
+    return label or heuristic_evaluation(question, answer, tech_stack)
 
 
 # Rick greets the user and asks for their name and readiness
@@ -128,6 +151,15 @@ def greet_candidate(state: InterviewState) -> InterviewState:
     print(f"   History length: {len(state.get('history', []))}")
     
     if not state.get("greeting_done", False):
+        greeting = pooled_line(state, "greeting")
+        if greeting:
+            state["last_response"] = greeting
+            state["history"].append(compact_state.history_entry("rick", greeting))
+            print(f"   Pooled greeting: {greeting[:50]}...")
+            state["greeting_done"] = True
+            print(f"🎯 EXITING greet_candidate - last_response: {state['last_response'][:50]}...")
+            return state
+
         # Use GPT to generate a personalized greeting based on candidate info
         prompt = f"""As Rick Sanchez, generate a greeting for a technical interview candidate.
         Candidate Name: {state['candidate_name']}
@@ -141,33 +173,33 @@ def greet_candidate(state: InterviewState) -> InterviewState:
         6. Be under 2 sentences"""
         
         try:
-            response = openai.chat.completions.create(
-                model="gpt-4-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.7
-            )
-            greeting = response.choices[0].message.content.strip()
+            greeting = chat_completion([{"role": "user", "content": prompt}], temperature=0.7, kind="greeting")
             # Store in state instead of printing
             state["last_response"] = greeting
             # Add to history
-            state["history"].append({"speaker": "rick", "content": greeting})
+            state["history"].append(compact_state.history_entry("rick", greeting))
             print(f"   Generated greeting: {greeting[:50]}...")
 
         except Exception as e:
-            # Fallback greeting if API call fails
-            greeting = f"Alright {state['candidate_name']}... *burp* Are you ready to get schwifty in this tech interview?"
+            # Fallback greeting if API call fails or the LLM circuit is open
+            greeting = templated_greeting(state['candidate_name'], state['tech_stack'])
             state["last_response"] = greeting
-            state["history"].append({"speaker": "rick", "content": greeting})
+            state["history"].append(compact_state.history_entry("rick", greeting))
             print(f"   Fallback greeting: {greeting}")
         
         state["greeting_done"] = True
 
     elif state.get("history", None) and len(state["history"]) > 0:
         # Get all candidate responses so far
-        all_responses = [entry["content"] for entry in state["history"] if entry["speaker"] == "candidate"]
-        if all_responses:
+        all_responses = [compact_state.content(entry) for entry in state["history"] if compact_state.speaker(entry) == "candidate"]
+        pooled = pooled_line(state, "follow_up_greeting") if all_responses else None
+        if pooled:
+            state["last_response"] = pooled
+            state["history"].append(compact_state.history_entry("rick", pooled))
+            print(f"   Pooled follow-up: {pooled[:50]}...")
+        elif all_responses:
             # Get the full conversation history
-            conversation_history = "\n".join([f"{'Rick' if entry['speaker'] == 'rick' else 'Candidate'}: {entry['content']}" 
+            conversation_history = "\n".join([f"{'Rick' if compact_state.speaker(entry) == 'rick' else 'Candidate'}: {compact_state.content(entry)}" 
                                             for entry in state["history"][-6:]])  # Last 6 exchanges
             
             prompt = f"""As Rick Sanchez, generate a follow-up greeting based on this conversation history.
@@ -182,28 +214,23 @@ def greet_candidate(state: InterviewState) -> InterviewState:
             4. Be concise and under 2 sentences"""
             
             try:
-                response = openai.chat.completions.create(
-                    model="gpt-4-turbo",
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.7
-                )
-                greeting = response.choices[0].message.content.strip()
+                greeting = chat_completion([{"role": "user", "content": prompt}], temperature=0.7, kind="greeting")
                 state["last_response"] = greeting
-                state["history"].append({"speaker": "rick", "content": greeting})
+                state["history"].append(compact_state.history_entry("rick", greeting))
                 print(f"   Follow-up greeting: {greeting[:50]}...")
 
             except Exception as e:
-                # Fallback if API call fails
-                greeting = f"*burp* So, {state['candidate_name']}, are you ready this time or what?"
+                # Fallback if API call fails or the LLM circuit is open
+                greeting = templated_greeting(state['candidate_name'], state['tech_stack'], follow_up=True, rotation=len(all_responses))
                 state["last_response"] = greeting
-                state["history"].append({"speaker": "rick", "content": greeting})
+                state["history"].append(compact_state.history_entry("rick", greeting))
                 print(f"   Fallback follow-up: {greeting}")
     
     print(f"🎯 EXITING greet_candidate - last_response: {state['last_response'][:50]}...")
     return state
 
 # Process user's response to greeting to extract readiness
-def process_greeting_response(state: InterviewState) -> InterviewState:
+def process_greeting_response(state: InterviewState, config: RunnableConfig = None) -> InterviewState:
     """Process the user's response to Rick's greeting using GPT to understand readiness."""
     print(f"🔄 ENTERING process_greeting_response")
     print(f"   last_response: '{state['last_response']}'")
@@ -217,10 +244,10 @@ def process_greeting_response(state: InterviewState) -> InterviewState:
     print(f"   ✅ Processing user response: '{response}'")
     
     # Add candidate's response to history
-    state["history"].append({"speaker": "candidate", "content": response})
+    state["history"].append(compact_state.history_entry("candidate", response))
 
     # Get recent conversation history
-    conversation_history = "\n".join([f"{'Rick' if entry['speaker'] == 'rick' else 'Candidate'}: {entry['content']}" 
+    conversation_history = "\n".join([f"{'Rick' if compact_state.speaker(entry) == 'rick' else 'Candidate'}: {compact_state.content(entry)}" 
                                      for entry in state["history"][-6:]])  # Last 6 exchanges
 
     prompt = f"""As Rick Sanchez, analyze this conversation to determine if the candidate is ready to start the interview:
@@ -232,29 +259,26 @@ def process_greeting_response(state: InterviewState) -> InterviewState:
     Respond with exactly one word: 'ready' or 'wait'"""
 
     try:
-        gpt_response = openai.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        
-        result = gpt_response.choices[0].message.content.strip().lower()
+        result = classify([{"role": "user", "content": prompt}], READINESS_LABELS, default=None, kind="readiness", hedge=True)
         print(f"   GPT evaluation: {result}")
+        if result is None:
+            result = "ready" if heuristic_readiness(response) else "wait"
         
         if result == 'ready':
             state["ready_to_start"] = True
             print(f"   ✅ User is ready to start!")
         
     except Exception as e:
-        # Fallback to simple check if API call fails
-        response_lower = response.lower()
-        ready_indicators = ["yes", "ready", "let's go", "start", "begin", "sure", "yep", "yeah", "ok", "okay", "i'm ready", "im ready"]
-        
-        if any(indicator in response_lower for indicator in ready_indicators):
+        # Fallback to simple check if API call fails or the LLM circuit is open
+        if heuristic_readiness(response):
             state["ready_to_start"] = True
             print(f"   ✅ Fallback: User is ready to start!")
         else:
             print(f"   ❌ Fallback: User not ready yet")
+
+    # Plan the interview in the background, so RickAgent can serve questions without waiting on the LLM
+    if state.get("ready_to_start") and not state.get("plan"):
+        interview_plan.schedule_refill((config or {}).get("configurable", {}).get("thread_id"), state)
     
     print(f"🔄 EXITING process_greeting_response - ready_to_start: {state.get('ready_to_start', False)}")
     return state
@@ -264,12 +288,12 @@ def greeting_response_router(state: InterviewState) -> str:
     """Route based on whether the candidate is ready to start."""
     print(f"🔀 ENTERING greeting_response_router")
     print(f"   ready_to_start: {state.get('ready_to_start', False)}")
-    print(f"   History: {[(entry['speaker'], entry['content'][:30]) for entry in state.get('history', [])]}")
+    print(f"   History: {[(compact_state.speaker(entry), compact_state.content(entry)[:30]) for entry in state.get('history', [])]}")
     
     # If this is just after Rick's greeting (no user response yet), stay in greeting mode
     if (state.get("history") and 
         len(state["history"]) > 0 and 
-        state["history"][-1]["speaker"] == "rick"):
+        compact_state.speaker(state["history"][-1]) == "rick"):
         print(f"   🔀 Routing to 'wait' (just after Rick's greeting)")
         return "wait"
     
@@ -283,20 +307,40 @@ def greeting_response_router(state: InterviewState) -> str:
 def get_current_question(state: InterviewState) -> str:
     """Get the most recent question from the current thread (could be base question or follow-up)."""
     thread = state.get("current_thread", [])
-    questions = [entry["content"] for entry in thread if entry["type"] == "question"]
+    questions = [compact_state.content(entry) for entry in thread if compact_state.entry_type(entry) == "question"]
     return questions[-1] if questions else state.get("current_base_question", "")
 
+def pooled_line(state: InterviewState, kind: str) -> str:
+    """A pre-generated line for this kind with slots filled locally, or None to generate live (see RESPONSE_POOL_RATIO)."""
+    if not state.get("response_rotation"):
+        state["response_rotation"] = {}
+    # Topic of the current question as the scorecard matched it, else the stack itself
+    current = get_scorecard(state)["questions"][-1:] if state.get("ready_to_start") else []
+    topic = current[0]["topics"][0] if current and current[0]["topics"] else ""
+    question = get_current_question(state) if state.get("ready_to_start") else ""
+    return response_pool.pooled_response(kind, state["response_rotation"], state["candidate_name"], state.get("tech_stack", []), topic, question)
+
+def get_scorecard(state: InterviewState) -> dict:
+    """The interview's scorecard - created on first use for interviews checkpointed before scorecards existed."""
+    if not state.get("scorecard"):
+        state["scorecard"] = scorecard.new_scorecard(state.get("tech_stack", []))
+    return state["scorecard"]
+
 def get_thread_context(thread: List[dict]) -> str:
-    """Convert the thread history into a readable context string."""
+    """Convert the thread history into a readable context string, within the thread-context token budget.
+
+    The base question and the latest exchange stay verbatim; older follow-ups and fallbacks are dropped first.
+    """
     context = []
     for entry in thread:
-        if entry["type"] == "question":
-            context.append(f"Question: {entry['content']}")
-        elif entry["type"] == "response":
-            context.append(f"Response: {entry['content']}")
-        elif entry["type"] == "fallback":
-            context.append(f"Rick's Fallback: {entry['content']}")
-    return "\n".join(context)
+        kind, text = compact_state.entry_type(entry), compact_state.content(entry)
+        if kind == "question":
+            context.append(f"Question: {text}")
+        elif kind == "response":
+            context.append(f"Response: {text}")
+        elif kind == "fallback":
+            context.append(f"Rick's Fallback: {text}")
+    return fit_lines(context)
 
 def check_and_generate_followup(state: InterviewState) -> InterviewState:
     """Check if a follow-up question is needed and generate it if so."""
@@ -307,9 +351,11 @@ def check_and_generate_followup(state: InterviewState) -> InterviewState:
     # Reset fallback attempts since we got a relevant answer
     state["fallback_attempts"] = 0
     
+    card = get_scorecard(state)
     if not state["last_response"]:
         print(f"   → No response, moving to next question")
         # Move to next question - do the bookkeeping here
+        scorecard.close_question(card, "answered")
         state["current_question_index"] += 1
         state["follow_up_count"] = 0
         state["current_thread"] = []
@@ -317,6 +363,17 @@ def check_and_generate_followup(state: InterviewState) -> InterviewState:
         print(f"🔍 EXITING check_and_generate_followup - routing: next_question")
         return state
     
+    if not llm_available():
+        # Degraded mode - no follow-ups, move straight on to the next (local) question
+        print(f"   → LLM unavailable, moving to next question")
+        scorecard.close_question(card, "answered")
+        state["current_question_index"] += 1
+        state["follow_up_count"] = 0
+        state["current_thread"] = []
+        state["_routing"] = "next_question"
+        print(f"🔍 EXITING check_and_generate_followup - routing: next_question")
+        return state
+
     thread_context = get_thread_context(state["current_thread"])
 
     # Format experience
@@ -326,16 +383,18 @@ def check_and_generate_followup(state: InterviewState) -> InterviewState:
     if exp_months > 0:
         experience_str += f" and {exp_months} months"
     
+    profile = f"""Candidate Profile:
+    - Tech Stack: {', '.join(state['tech_stack'])}
+    - Experience: {experience_str}
+    - Interested Roles: {', '.join(state['interested_roles'])}"""
+
     prompt = f"""As Rick Sanchez, analyze if the candidate's response warrants a follow-up question.
     Base Question: {state['current_base_question']}
     Current Follow-up Count: {state['follow_up_count']}
     Full Conversation Thread:(ignore if empty)
     {thread_context}
     
-    Candidate Profile:
-    - Tech Stack: {', '.join(state['tech_stack'])}
-    - Experience: {experience_str}
-    - Interested Roles: {', '.join(state['interested_roles'])}
+    {profile}
     Consider:
     1. Is the answer partially correct but needs clarification?
     2. Did they mention something interesting that could be explored further?
@@ -344,41 +403,40 @@ def check_and_generate_followup(state: InterviewState) -> InterviewState:
     5. Have we already asked enough follow-ups for this topic?
     6. Are we still exploring the core concept of the base question?
     7. Is the follow-up appropriate for their experience level and role interests?
-    IMPORTANT: Respond with EXACTLY one of the below two options:
-    If no follow-up is needed, respond with exactly one word: NO_FOLLOWUP
-    If a follow-up is needed, respond with ONLY the follow-up question in Rick's voice. Do not include any analysis, explanation, or reasoning. Just the question itself.
-    The follow-up question should:
+    If a follow-up is needed, the question should:
     - Build upon their previous answers in the thread
     - Connect to their tech stack and role interests  
     - Maintain Rick's character
     - Be challenging but fair for their experience level
     - Not repeat previous follow-ups
-    - Stay focused on the original base question"""
+    - Stay focused on the original base question
+    Respond with ONLY a JSON object: {{"decision": "ask" or "next", "question": "<the follow-up question in Rick's voice, or empty when next>"}}"""
 
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7
-        )
-        result = response.choices[0].message.content.strip()
+        # One round trip either way: the "next" answer is a handful of tokens, the "ask" answer carries the question
+        answer = json.loads(chat_completion([{"role": "user", "content": prompt}], temperature=0.7, kind="followup", hedge=True, response_format={"type": "json_object"}))
+        decision = answer.get("decision") if isinstance(answer, dict) else None
+        follow_up = str(answer.get("question") or "").strip() if isinstance(answer, dict) else ""
+        if decision not in FOLLOWUP_LABELS or (decision == "ask" and not follow_up):
+            print(f"   ⚠️ Off-script follow-up decision {decision!r}, moving on")
+            decision = "next"
         
-        if result == "NO_FOLLOWUP":
+        if decision == "next":
             print(f"   → No follow-up needed, moving to next question")
             # Move to next question - do the bookkeeping here
+            scorecard.close_question(card, "answered")
             state["current_question_index"] += 1
             state["follow_up_count"] = 0
             state["current_thread"] = []
             state["_routing"] = "next_question"
         else:
-            print(f"   → Generated follow-up question: {result[:50]}...")
-            # Generate follow-up
-            follow_up = result
-            state["current_thread"].append({"type": "question", "content": follow_up})
-            state["history"].append({"speaker": "rick", "content": follow_up})
+            print(f"   → Generated follow-up question: {follow_up[:50]}...")
+            state["current_thread"].append(compact_state.thread_entry("question", follow_up))
+            state["history"].append(compact_state.history_entry("rick", follow_up))
             # Store the follow-up in last_response so it gets returned
             state["last_response"] = follow_up
             state["follow_up_count"] += 1
+            scorecard.record_followup(card, follow_up, state["tech_stack"])
             state["_routing"] = "follow_up"
             
         print(f"🔍 EXITING check_and_generate_followup - routing: {state['_routing']}")
@@ -386,6 +444,7 @@ def check_and_generate_followup(state: InterviewState) -> InterviewState:
     except:
         print(f"   → Error occurred, moving to next question")
         # Move to next question on error - do the bookkeeping here
+        scorecard.close_question(card, "answered")
         state["current_question_index"] += 1
         state["follow_up_count"] = 0
         state["current_thread"] = []
@@ -395,6 +454,10 @@ def check_and_generate_followup(state: InterviewState) -> InterviewState:
 
 def generate_personalized_fallback(state: InterviewState) -> str:
     """Generate a personalized fallback response based on the candidate's tech stack and history."""
+    pooled = pooled_line(state, "personalized")
+    if pooled:
+        return pooled
+
     # Format experience
     exp_years = state["experience"].get('years', 0)
     exp_months = state["experience"].get('months', 0)
@@ -412,7 +475,7 @@ def generate_personalized_fallback(state: InterviewState) -> str:
     Candidate Name: {state['candidate_name']}
     Original Base Question: {state['questions'][state['current_question_index']]}
     Full Conversation Thread(ignore if empty):{context_prompt}
-    Their last response: {state['last_response']}
+    Their last response: {clip(state['last_response'], ANSWER_TOKEN_BUDGET)}
     Fallback Attempt: {state['fallback_attempts']}
     Candidate Profile:
     - Tech Stack: {', '.join(state['tech_stack'])}
@@ -430,17 +493,16 @@ def generate_personalized_fallback(state: InterviewState) -> str:
     6. Only reply with the response in Rick's voice. Do not include any analysis, explanation, or reasoning. Just the response itself"""
 
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.8
-        )
-        return response.choices[0].message.content.strip()
+        return chat_completion([{"role": "user", "content": prompt}], temperature=0.8, kind="fallback")
     except:
-        return "That's not even close. Try again, and this time use your brain."
+        return templated_fallback(state['candidate_name'], state['tech_stack'], state['fallback_attempts'], guidance=False)
 
 def generate_guidance_fallback(state: InterviewState) -> str:
     """Generate a fallback response that tries to guide the user back to the topic."""
+    pooled = pooled_line(state, "guidance")
+    if pooled:
+        return pooled
+
     # Format experience
     exp_years = state["experience"].get('years', 0)
     exp_months = state["experience"].get('months', 0)
@@ -457,7 +519,7 @@ def generate_guidance_fallback(state: InterviewState) -> str:
     prompt = f"""As Rick Sanchez, generate a response that guides the candidate back to the topic.
     Full Conversation Thread(ignore if empty):{context_prompt}
     Candidate Name: {state['candidate_name']}
-    Their last response: {state['last_response']}
+    Their last response: {clip(state['last_response'], ANSWER_TOKEN_BUDGET)}
     Fallback Attempt: {state['fallback_attempts']}
     Candidate Profile:
     - Tech Stack: {', '.join(state['tech_stack'])}
@@ -477,17 +539,14 @@ def generate_guidance_fallback(state: InterviewState) -> str:
     8. Only reply with the response in Rick's voice. Do not include any analysis, explanation, or reasoning. Just the response itself"""
 
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.8
-        )
-        return response.choices[0].message.content.strip()
+        return chat_completion([{"role": "user", "content": prompt}], temperature=0.8, kind="fallback")
     except:
-        return "That's not even close to what I asked. Try focusing on the actual question, *burp*"
+        return templated_fallback(state['candidate_name'], state['tech_stack'], state['fallback_attempts'], guidance=True)
 
 def fallback_agent(state: InterviewState) -> InterviewState:
     state["fallback_attempts"] += 1
+    card = get_scorecard(state)
+    scorecard.record_fallback(card)
     print(f"🔄 ENTERING fallback_agent")
     print(f"   Fallback attempts: {state['fallback_attempts']}")
     print(f"   Current question index: {state.get('current_question_index', 0)}")
@@ -495,6 +554,7 @@ def fallback_agent(state: InterviewState) -> InterviewState:
     # If we've had too many fallback attempts, move to next question
     if state["fallback_attempts"] > 3:
         print(f"📋 Too many fallback attempts ({state['fallback_attempts']}), moving to next question")
+        scorecard.close_question(card, "abandoned")
         state["current_question_index"] += 1
         state["fallback_attempts"] = 0
         state["follow_up_count"] = 0
@@ -517,13 +577,59 @@ def fallback_agent(state: InterviewState) -> InterviewState:
     # Store in state instead of printing
     state["last_response"] = fallback_response
     # Add fallback to global history
-    state["history"].append({"speaker": "rick", "content": fallback_response})
-    state["current_thread"].append({"type": "fallback", "content": fallback_response})
+    state["history"].append(compact_state.history_entry("rick", fallback_response))
+    state["current_thread"].append(compact_state.thread_entry("fallback", fallback_response))
     state["_routing"] = "terminal"  # Normal fallback is terminal
     print(f"🔄 EXITING fallback_agent - routing: terminal")
     return state
 
-def rick_agent(state: InterviewState) -> InterviewState:
+def select_new_question(state: InterviewState) -> str:
+    """Pick the next base question: question bank first, then live generation, then the local bank - skipping near-duplicates of anything already asked."""
+    asked = state.get("questions", [])
+    experience = state.get("experience", {"years": 0, "months": 0})
+    roles = state.get("interested_roles", [])
+    index = QuestionIndex(asked)
+    rejected = []
+
+    # Serve from the pre-generated bank first - live generation is only needed for unusual stacks
+    for _ in range(MAX_BANK_DRAWS):
+        try:
+            candidate = draw_question(state["tech_stack"], roles, experience, asked + rejected, state["current_question_index"])
+        except Exception as e:
+            print(f"   ⚠️ Question bank unavailable: {e}")
+            break
+        if not candidate:
+            break
+        if not index.is_near_duplicate(candidate):
+            print(f"   🏦 Drew question from the question bank")
+            return candidate
+        rejected.append(candidate)
+
+    candidate = None
+    # Degraded mode - no point building prompts the breaker would refuse
+    attempts = MAX_QUESTION_REGENERATIONS + 1 if llm_available() else 0
+    for attempt in range(attempts):
+        # Pass previous questions for context
+        try:
+            # Rejected drafts count as asked, so the retry is steered away from them
+            candidate = generate_rick_question(state["tech_stack"], experience, roles, asked + rejected)
+        except Exception as e:
+            # Degraded mode - serve a question from the local bank
+            print(f"   ⚠️ Question generation unavailable ({type(e).__name__}), using local question bank")
+            break
+        if not index.is_near_duplicate(candidate):
+            return candidate
+        rejected.append(candidate)
+        if attempt < attempts - 1:
+            print(f"   🔁 Regenerating question ({attempt + 1}/{MAX_QUESTION_REGENERATIONS})")
+
+    substitute = local_question(state["tech_stack"], asked, state["current_question_index"])
+    if candidate is None or not index.is_near_duplicate(substitute):
+        return substitute
+    # Everything looks familiar - better a similar question than none
+    return candidate
+
+def rick_agent(state: InterviewState, config: RunnableConfig = None) -> InterviewState:
     print(f"🤖 ENTERING rick_agent")
     print(f"   Current question index: {state.get('current_question_index', 0)}")
     print(f"   Questions length: {len(state.get('questions', []))}")
@@ -547,17 +653,25 @@ def rick_agent(state: InterviewState) -> InterviewState:
     
     # Generate new question if needed
     if state["current_question_index"] >= len(state["questions"]):
-        print(f"   🔥 Generating new question...")
-        # Pass previous questions for context
-        new_question = generate_rick_question(state["tech_stack"], state.get("experience", {"years": 0, "months": 0}), state.get("interested_roles", []), state.get("questions", []))
+        thread_id = (config or {}).get("configurable", {}).get("thread_id")
+        planned = interview_plan.next_planned_question(state, thread_id)
+        if planned:
+            print(f"   🗺️ Serving planned question ({planned['topic']}, {planned['difficulty']})")
+            new_question = planned["question"]
+        else:
+            print(f"   🔥 Generating new question...")
+            new_question = select_new_question(state)
         state["questions"].append(new_question) # The list of questions increases by 1 meaning that the current question index is now equal to the length of the questions list
         state["current_base_question"] = new_question
+        scorecard.record_question(get_scorecard(state), state["current_question_index"], new_question, state["tech_stack"], planned["topic"] if planned else "")
+        # Top the plan up off the request path before it runs out
+        interview_plan.schedule_refill(thread_id, state)
         state["follow_up_count"] = 0
-        state["current_thread"] = [{"type": "question", "content": new_question}]
+        state["current_thread"] = [compact_state.thread_entry("question", new_question)]
         # Store in state instead of printing
         state["last_response"] = new_question
         # Add to global history too
-        state["history"].append({"speaker": "rick", "content": new_question})
+        state["history"].append(compact_state.history_entry("rick", new_question))
         print(f"   Generated question: {new_question[:50]}...")
     
     print(f"🤖 EXITING rick_agent - last_response: {state['last_response'][:50]}...")
@@ -574,13 +688,22 @@ def answer_evaluator(state: InterviewState) -> InterviewState:
     print(f"   Response: {response[:50]}...")
     
     # Add candidate's response to history
-    state["history"].append({"speaker": "candidate", "content": response})
+    state["history"].append(compact_state.history_entry("candidate", response))
     # Also add to current thread for this specific question
-    state["current_thread"].append({"type": "response", "content": response})
+    state["current_thread"].append(compact_state.thread_entry("response", response))
     # Get thread context for better evaluation
     thread_context = get_thread_context(state["current_thread"])
-    evaluation = evaluate_answer(current_question, response, state["tech_stack"], state.get("experience", {"years": 0, "months": 0}), state.get("interested_roles", []), thread_context)
+    evaluation = None
+    if llm_available():
+        try:
+            evaluation = evaluate_answer(current_question, response, state["tech_stack"], state.get("experience", {"years": 0, "months": 0}), state.get("interested_roles", []), thread_context)
+        except Exception as e:
+            print(f"   ⚠️ Evaluation unavailable ({type(e).__name__}), using heuristic evaluation")
+    if evaluation is None:
+        # Degraded mode - heuristic verdict instead of failing the turn
+        evaluation = heuristic_evaluation(current_question, response, state["tech_stack"])
     state["last_evaluation"] = evaluation
+    scorecard.record_evaluation(get_scorecard(state), evaluation)
     
     print(f"   Evaluation: {evaluation}")
     print(f"📊 EXITING answer_evaluator")
@@ -589,9 +712,10 @@ def answer_evaluator(state: InterviewState) -> InterviewState:
 
 # Route based on evaluator result
 def evaluation_decision(state: InterviewState) -> str:
-    """Route based on the evaluation result."""
-    print(f"🔀 EVALUATION ROUTING: {state.get('last_evaluation', 'unknown')}")
-    return state.get("last_evaluation", "irrelevant")
+    """Route based on the evaluation result - always a key of the Evaluator's path map."""
+    evaluation = state.get("last_evaluation", "")
+    print(f"🔀 EVALUATION ROUTING: {evaluation or 'unknown'}")
+    return evaluation if evaluation in EVALUATION_LABELS else "irrelevant"
 
 # Route based on follow-up check result
 def followup_router(state: InterviewState) -> str:
@@ -607,17 +731,6 @@ def fallback_router(state: InterviewState) -> str:
     print(f"🔀 FALLBACK ROUTING: {routing}")
     return routing
 
-# Construct the LangGraph - SINGLE GRAPH DESIGN
-graph = StateGraph(InterviewState)
-
-# Define all necessary nodes
-graph.add_node("GreetCandidate", greet_candidate)
-graph.add_node("GreetingResponse", process_greeting_response)
-graph.add_node("RickAgent", rick_agent)
-graph.add_node("Evaluator", answer_evaluator)
-graph.add_node("FollowUpCheck", check_and_generate_followup)
-graph.add_node("FallbackAgent", fallback_agent)
-
 # Smart entry point routing
 def determine_entry_point(state: InterviewState) -> str:
     """Determine where to start based on current state."""
@@ -651,68 +764,120 @@ def determine_entry_point(state: InterviewState) -> str:
     print(f"   → Default to GreetCandidate")
     return "GreetCandidate"
 
-# Set conditional entry point - ONLY for user input routing
-graph.add_conditional_edges(
-    "__start__",
-    determine_entry_point,
-    path_map={
-        "GreetCandidate": "GreetCandidate",
-        "GreetingResponse": "GreetingResponse", 
-        "Evaluator": "Evaluator"
-        # ✅ REMOVED: RickAgent - now only reached through internal graph flows
-        # ✅ REMOVED: FallbackAgent and NextQuestionAgent 
-        # These are only reached through internal graph flows
-    }
-)
-
-# Greeting flow
-graph.add_conditional_edges(
-    "GreetingResponse",
-    greeting_response_router,
-    path_map={
-        "start_interview": "RickAgent",
-        "wait": "GreetCandidate",
-    },
-)
-
-# Evaluation flow - routes to fallback or follow-up check
-graph.add_conditional_edges(
-    "Evaluator",
-    evaluation_decision,
-    path_map={
-        "relevant": "FollowUpCheck",
-        "irrelevant": "FallbackAgent", 
-        "gibberish": "FallbackAgent",
-    }
-)
-
-# Fallback flow - can route to RickAgent or be terminal
-graph.add_conditional_edges(
-    "FallbackAgent",
-    fallback_router,
-    path_map={
-        "to_rick_agent": "RickAgent",  # Route to RickAgent for next question
-        "terminal": "__end__"          # Normal fallback is terminal
-    }
-)
-
-# Follow-up flow - FollowUpCheck can be terminal when generating follow-ups
-graph.add_conditional_edges(
-    "FollowUpCheck",
-    followup_router,
-    path_map={
-        "follow_up": "__end__",  # ✅ Follow-up questions are terminal (user-facing)
-        "next_question": "RickAgent"  # ✅ Direct to RickAgent, no intermediate node
-    }
-)
+# Construct the LangGraph - SINGLE GRAPH DESIGN
+def build_graph() -> StateGraph:
+    """Build the interview StateGraph (nodes and routing) - compiled later, once a checkpointer exists."""
+    graph = StateGraph(InterviewState)
 
-# Compile the graph with MongoDB persistence
-# Use the same MongoDB URI we're already using
-MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-from pymongo import MongoClient
-client = MongoClient(MONGO_URI)
-checkpointer = MongoDBSaver(client)
-compiled_graph = graph.compile(checkpointer=checkpointer)
+    # Define all necessary nodes
+    graph.add_node("GreetCandidate", greet_candidate)
+    graph.add_node("GreetingResponse", process_greeting_response)
+    graph.add_node("RickAgent", rick_agent)
+    graph.add_node("Evaluator", answer_evaluator)
+    graph.add_node("FollowUpCheck", check_and_generate_followup)
+    graph.add_node("FallbackAgent", fallback_agent)
+
+    # Set conditional entry point - ONLY for user input routing
+    graph.add_conditional_edges(
+        "__start__",
+        determine_entry_point,
+        path_map={
+            "GreetCandidate": "GreetCandidate",
+            "GreetingResponse": "GreetingResponse", 
+            "Evaluator": "Evaluator"
+            # ✅ REMOVED: RickAgent - now only reached through internal graph flows
+            # ✅ REMOVED: FallbackAgent and NextQuestionAgent 
+            # These are only reached through internal graph flows
+        }
+    )
+
+    # Greeting flow
+    graph.add_conditional_edges(
+        "GreetingResponse",
+        greeting_response_router,
+        path_map={
+            "start_interview": "RickAgent",
+            "wait": "GreetCandidate",
+        },
+    )
+
+    # Evaluation flow - routes to fallback or follow-up check
+    graph.add_conditional_edges(
+        "Evaluator",
+        evaluation_decision,
+        path_map={
+            "relevant": "FollowUpCheck",
+            "irrelevant": "FallbackAgent", 
+            "gibberish": "FallbackAgent",
+        }
+    )
+
+    # Fallback flow - can route to RickAgent or be terminal
+    graph.add_conditional_edges(
+        "FallbackAgent",
+        fallback_router,
+        path_map={
+            "to_rick_agent": "RickAgent",  # Route to RickAgent for next question
+            "terminal": "__end__"          # Normal fallback is terminal
+        }
+    )
+
+    # Follow-up flow - FollowUpCheck can be terminal when generating follow-ups
+    graph.add_conditional_edges(
+        "FollowUpCheck",
+        followup_router,
+        path_map={
+            "follow_up": "__end__",  # ✅ Follow-up questions are terminal (user-facing)
+            "next_question": "RickAgent"  # ✅ Direct to RickAgent, no intermediate node
+        }
+    )
+    return graph
+
+# Compile the graph with MongoDB persistence - done lazily (or from the FastAPI lifespan), not at import time
+CHECKPOINT_DB_NAME = "checkpointing_db"
+CHECKPOINT_COLLECTION_NAME = "checkpoints"
+WRITES_COLLECTION_NAME = "checkpoint_writes"
+client = None
+checkpointer = None
+compiled_graph = None
+_init_lock = threading.Lock()
+
+def init_agent(mongo_client: MongoClient = None):
+    """Connect the checkpointer and compile the graph; reuses the caller's MongoClient when given one."""
+    global client, checkpointer, compiled_graph
+    with _init_lock:
+        if compiled_graph is None:
+            started = time.perf_counter()
+            client = mongo_client or mongo.get_client()
+            checkpointer = MongoDBSaver(client, db_name=CHECKPOINT_DB_NAME, checkpoint_collection_name=CHECKPOINT_COLLECTION_NAME, writes_collection_name=WRITES_COLLECTION_NAME)
+            # Same serializer underneath, plus zstd for large checkpoints
+            checkpointer.serde = CompactSerializer(checkpointer.serde)
+            compiled_graph = build_graph().compile(checkpointer=checkpointer)
+            print(f"🧠 Interview graph compiled in {(time.perf_counter() - started) * 1000:.0f}ms")
+    return compiled_graph
+
+def get_compiled_graph():
+    """Compiled graph, initializing on first use if the lifespan hasn't done it yet."""
+    return compiled_graph if compiled_graph is not None else init_agent()
+
+def warmup() -> dict:
+    """Open the Mongo and OpenAI connection pools before the first candidate needs them; returns timings in ms."""
+    timings = {}
+    started = time.perf_counter()
+    client.admin.command("ping")
+    client[CHECKPOINT_DB_NAME][CHECKPOINT_COLLECTION_NAME].find_one({}, {"_id": 1})
+    timings["mongo_ms"] = round((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    try:
+        # Cheap authenticated request - establishes the TLS connection in the OpenAI client's pool
+        get_client().models.retrieve("gpt-4-turbo", timeout=5)
+        timings["openai_ms"] = round((time.perf_counter() - started) * 1000)
+    except Exception as e:
+        print(f"⚠️ OpenAI warmup failed (continuing): {e}")
+        timings["openai_ms"] = None
+    print(f"🔥 Warmup done: {timings}")
+    return timings
 
 # Service class - SIMPLIFIED
 class RickInterviewService:
@@ -731,8 +896,9 @@ class RickInterviewService:
         initial_state = initialize_interview(candidate_name, tech_stack, experience, interested_roles)
         self.active_interviews[candidate_id] = {"config": config}
         
-        # Invoke the single graph
-        result = compiled_graph.invoke(initial_state, config=config)
+        # Invoke the single graph - every node shares one turn deadline
+        with turn_deadline():
+            result = get_compiled_graph().invoke(initial_state, config=config)
         
         return result.get("last_response", "Hello! I'm Rick, ready to start your interview.")
     
@@ -757,7 +923,7 @@ class RickInterviewService:
             
             # Check if state exists in MongoDB (LangGraph persistence)
             try:
-                existing_state = compiled_graph.get_state(config=config)
+                existing_state = get_compiled_graph().get_state(config=config)
 
                 if existing_state.values:
                     # Resume existing interview - restore backend tracking
@@ -775,17 +941,106 @@ class RickInterviewService:
         
         config = self.active_interviews[candidate_id]["config"]
         # Get current state and update with user message
-        current_state = compiled_graph.get_state(config=config)
-        updated_input = current_state.values.copy()
-        updated_input["last_response"] = message
-        # Invoke the same single graph
-        result = compiled_graph.invoke(updated_input, config=config)
+        current_state = get_compiled_graph().get_state(config=config)
+        result = self.run_turn(candidate_id, current_state.values, message)
         return result.get("last_response", "I'm having trouble processing that.")
+
+    def open_session(self, candidate_id: str) -> dict:
+        """Load the candidate's interview state once for a long-lived session (e.g. a WebSocket); {} if not started."""
+        values = self.get_state_values(candidate_id)
+        if values:
+            self.active_interviews[candidate_id] = {"config": {"configurable": {"thread_id": candidate_id}}}
+        return values
+
+    def run_turn(self, candidate_id: str, values: dict, message: str, on_progress=None) -> dict:
+        """Run one graph step from already-loaded state and return the new state.
+
+        on_progress(node_name) is called as each node finishes, for callers that stream progress to the client.
+        """
+        config = {"configurable": {"thread_id": candidate_id}}
+        updated_input = dict(values)
+        updated_input["last_response"] = message
+        # Same condition determine_entry_point uses to route the turn to the Evaluator
+        evaluated = bool(updated_input.get("ready_to_start") and updated_input.get("questions") and message)
+        result = updated_input
+        # Run the same single graph - every node shares one turn deadline
+        with turn_deadline():
+            for mode, chunk in get_compiled_graph().stream(updated_input, config=config, stream_mode=["updates", "values"]):
+                if mode == "values":
+                    result = chunk
+                elif on_progress is not None:
+                    for node in chunk:
+                        on_progress(node)
+        self.active_interviews.setdefault(candidate_id, {"config": config})["last_turn"] = {
+            "evaluation": result.get("last_evaluation") if evaluated else None,
+            "question_index": result.get("current_question_index", 0),
+        }
+        return result
     
+    def last_turn(self, candidate_id: str) -> dict:
+        """What happened on the candidate's most recent process_message call (evaluator verdict, question index)."""
+        return self.active_interviews.get(candidate_id, {}).get("last_turn", {})
+
+    def get_phase(self, candidate_id: str) -> dict:
+        """Summarize where the candidate is in the interview from the checkpointed LangGraph state."""
+        config = {"configurable": {"thread_id": candidate_id}}
+        values = get_compiled_graph().get_state(config=config).values
+        if not values:
+            phase = "not_started"
+        elif not values.get("ready_to_start", False):
+            phase = "greeting"
+        else:
+            phase = "interviewing"
+        return {
+            "phase": phase,
+            "question_index": values.get("current_question_index", 0) if values else 0,
+            "follow_up_count": values.get("follow_up_count", 0) if values else 0,
+            "fallback_attempts": values.get("fallback_attempts", 0) if values else 0,
+        }
+
+    def get_scorecard(self, candidate_id: str) -> dict:
+        """Recruiter report built from the scorecard kept in the checkpointed state - no transcript, no LLM call."""
+        config = {"configurable": {"thread_id": candidate_id}}
+        values = get_compiled_graph().get_state(config=config).values
+        if not values:
+            raise ValueError(f"No interview found for candidate {candidate_id}.")
+        tech_stack = values.get("tech_stack", [])
+        card = values.get("scorecard") or scorecard.new_scorecard(tech_stack)
+        return {"candidate_name": values.get("candidate_name", ""), **scorecard.report(card, tech_stack)}
+
+    def get_state_values(self, candidate_id: str) -> dict:
+        """Latest checkpointed interview state for the candidate ({} when there is none)."""
+        config = {"configurable": {"thread_id": candidate_id}}
+        return get_compiled_graph().get_state(config=config).values or {}
+
+    def checkpoint_version(self, candidate_id: str):
+        """Id of the thread's latest checkpoint (None if there is none) - one indexed read, no state deserialization.
+
+        Long-lived sessions compare it before a turn to notice turns taken elsewhere (e.g. over HTTP /chat).
+        """
+        get_compiled_graph()
+        doc = client[CHECKPOINT_DB_NAME][CHECKPOINT_COLLECTION_NAME].find_one(
+            {"thread_id": candidate_id, "checkpoint_ns": ""}, {"checkpoint_id": 1, "_id": 0}, sort=[("checkpoint_id", -1)]
+        )
+        return doc["checkpoint_id"] if doc else None
+
+    def restore_state(self, candidate_id: str, values: dict) -> None:
+        """Write interview state (from an export or the archive) as the thread's latest checkpoint."""
+        config = {"configurable": {"thread_id": candidate_id}}
+        get_compiled_graph().update_state(config, values, as_node="__start__")
+
+    def delete_state(self, candidate_id: str) -> None:
+        """Remove every checkpoint and pending write of the candidate's thread."""
+        get_compiled_graph()
+        client[CHECKPOINT_DB_NAME][CHECKPOINT_COLLECTION_NAME].delete_many({"thread_id": candidate_id})
+        client[CHECKPOINT_DB_NAME][WRITES_COLLECTION_NAME].delete_many({"thread_id": candidate_id})
+        self.active_interviews.pop(candidate_id, None)
+
     def end_interview(self, candidate_id: str) -> None:
         """End interview session."""
         if candidate_id in self.active_interviews:
             del self.active_interviews[candidate_id]
+        interview_plan.discard(candidate_id)
 
 # Create a singleton service instance
 interview_service = RickInterviewService()
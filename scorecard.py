@@ -0,0 +1,114 @@
+import re
+from typing import List
+from tech_extraction import extract_local, canonicalize
+
+# Verdicts answer_evaluator can produce - anything else is counted as irrelevant
+EVALUATION_LABELS = ("relevant", "irrelevant", "gibberish")
+
+# Scorecards live inside the checkpointed InterviewState, so they hold counters and indexes only -
+# never question or answer text (that is already in history / chat_history).
+
+
+def new_scorecard(tech_stack: List[str]) -> dict:
+    """Empty scorecard for a candidate's stack."""
+    return {
+        "questions": [],
+        "coverage": {tech: 0 for tech in tech_stack},
+        "totals": {**{label: 0 for label in EVALUATION_LABELS}, "follow_ups": 0, "fallbacks": 0, "abandoned": 0},
+    }
+
+
+def _current(scorecard: dict) -> dict:
+    return scorecard["questions"][-1] if scorecard["questions"] else None
+
+
+def _covered_topics(text: str, tech_stack: List[str]) -> List[str]:
+    """Which of the candidate's technologies the text is about, matched through the alias dictionary.
+
+    Names the dictionary doesn't know are matched as whole words only, so "Go" isn't found in "algorithm"
+    and "Java" isn't found in "JavaScript".
+    """
+    found = set(extract_local(text)[0])
+    return [tech for tech, canonical in zip(tech_stack, _canonical_names(tech_stack)) if canonical in found or _mentions(text, tech)]
+
+
+def _mentions(text: str, name: str) -> bool:
+    # Word characters plus + and #, so "C" doesn't match inside "C++" or "C#"
+    return re.search(rf"(?<![\w+#]){re.escape(name)}(?![\w+#])", text, re.IGNORECASE) is not None
+
+
+def _canonical_names(tech_stack: List[str]) -> List[str]:
+    """canonicalize() one entry at a time, so the result lines up with tech_stack."""
+    return [(canonicalize([tech]) or [tech])[0] for tech in tech_stack]
+
+
+def _add_topics(scorecard: dict, entry: dict, text: str, tech_stack: List[str]) -> None:
+    for tech in _covered_topics(text, tech_stack):
+        if tech not in entry["topics"]:
+            entry["topics"].append(tech)
+            scorecard["coverage"][tech] = scorecard["coverage"].get(tech, 0) + 1
+
+
+def record_question(scorecard: dict, index: int, question: str, tech_stack: List[str], topic: str = "") -> None:
+    """A new base question was asked; topic is the planned technology, when the question came from the interview plan."""
+    entry = {"index": index, "evaluations": {label: 0 for label in EVALUATION_LABELS}, "follow_ups": 0, "fallbacks": 0, "topics": [], "outcome": "open"}
+    scorecard["questions"].append(entry)
+    _add_topics(scorecard, entry, f"{topic} {question}", tech_stack)
+
+
+def record_evaluation(scorecard: dict, evaluation: str) -> None:
+    """answer_evaluator's verdict on the latest answer."""
+    label = evaluation if evaluation in EVALUATION_LABELS else "irrelevant"
+    scorecard["totals"][label] += 1
+    entry = _current(scorecard)
+    if entry is not None:
+        entry["evaluations"][label] += 1
+
+
+def record_followup(scorecard: dict, follow_up: str, tech_stack: List[str]) -> None:
+    """A follow-up was asked on the current question - follow-ups can reach into other parts of the stack."""
+    scorecard["totals"]["follow_ups"] += 1
+    entry = _current(scorecard)
+    if entry is not None:
+        entry["follow_ups"] += 1
+        _add_topics(scorecard, entry, follow_up, tech_stack)
+
+
+def record_fallback(scorecard: dict) -> None:
+    scorecard["totals"]["fallbacks"] += 1
+    entry = _current(scorecard)
+    if entry is not None:
+        entry["fallbacks"] += 1
+
+
+def close_question(scorecard: dict, outcome: str) -> None:
+    """The interview moved on from the current question ('answered' or 'abandoned' after too many fallbacks)."""
+    entry = _current(scorecard)
+    if entry is not None and entry["outcome"] == "open":
+        entry["outcome"] = outcome
+        if outcome == "abandoned":
+            scorecard["totals"]["abandoned"] += 1
+
+
+def report(scorecard: dict, tech_stack: List[str]) -> dict:
+    """Recruiter-facing summary, computed from the counters alone - no transcript and no LLM call."""
+    totals = scorecard["totals"]
+    questions = scorecard["questions"]
+    evaluated = sum(totals[label] for label in EVALUATION_LABELS)
+    coverage = {tech: scorecard["coverage"].get(tech, 0) for tech in tech_stack}
+    covered = [tech for tech, count in coverage.items() if count]
+    return {
+        "questions_asked": len(questions),
+        "questions_answered": sum(1 for entry in questions if entry["outcome"] == "answered"),
+        "questions_abandoned": totals["abandoned"],
+        "answers_evaluated": evaluated,
+        "relevance_rate": round(totals["relevant"] / evaluated, 2) if evaluated else None,
+        "follow_ups": totals["follow_ups"],
+        "max_follow_up_depth": max((entry["follow_ups"] for entry in questions), default=0),
+        "fallbacks": totals["fallbacks"],
+        "coverage": coverage,
+        "covered_technologies": covered,
+        "uncovered_technologies": [tech for tech in tech_stack if tech not in covered],
+        "coverage_ratio": round(len(covered) / len(tech_stack), 2) if tech_stack else None,
+        "per_question": questions,
+    }
@@ -0,0 +1,210 @@
+import re
+from collections import deque
+from functools import lru_cache
+from typing import List, Tuple
+
+# Canonical technology name -> aliases (matched case-insensitively on word boundaries).
+# Canonical names line up with the question bank and degraded-mode question keys.
+TECH_ALIASES = {
+    "Python": ["python", "python3", "py"],
+    "JavaScript": ["javascript", "js", "ecmascript", "es6", "vanilla js"],
+    "TypeScript": ["typescript", "ts"],
+    "Java": ["java"],
+    "C": ["c language", "ansi c"],
+    "C++": ["c++", "cpp"],
+    "C#": ["c#", "csharp", "c sharp"],
+    "Go": ["golang", "go lang"],
+    "Rust": ["rust", "rustlang"],
+    "Ruby": ["ruby"],
+    "PHP": ["php"],
+    "Kotlin": ["kotlin"],
+    "Swift": ["swift"],
+    "Scala": ["scala"],
+    "R": ["r language", "rstats"],
+    "Bash": ["bash", "shell scripting", "shell script"],
+    "HTML": ["html", "html5"],
+    "CSS": ["css", "css3"],
+    "Sass": ["sass", "scss"],
+    "Tailwind CSS": ["tailwind", "tailwindcss", "tailwind css"],
+    "React": ["react", "reactjs", "react.js", "react js"],
+    "React Native": ["react native", "react-native"],
+    "Next.js": ["next.js", "nextjs", "next js"],
+    "Vue.js": ["vue", "vuejs", "vue.js", "vue js"],
+    "Angular": ["angular", "angularjs", "angular.js"],
+    "Svelte": ["svelte", "sveltekit"],
+    "Redux": ["redux"],
+    "jQuery": ["jquery"],
+    "Node.js": ["node", "nodejs", "node.js", "node js"],
+    "Express.js": ["express", "expressjs", "express.js"],
+    "Django": ["django"],
+    "Flask": ["flask"],
+    "FastAPI": ["fastapi", "fast api"],
+    "Spring Boot": ["spring boot", "springboot", "spring framework"],
+    "Ruby on Rails": ["rails", "ruby on rails", "ror"],
+    ".NET": [".net", "dotnet", "asp.net"],
+    "GraphQL": ["graphql"],
+    "REST APIs": ["rest api", "rest apis", "restful"],
+    "gRPC": ["grpc"],
+    "SQL": ["sql"],
+    "PostgreSQL": ["postgres", "postgresql", "psql", "pg"],
+    "MySQL": ["mysql"],
+    "SQLite": ["sqlite"],
+    "Microsoft SQL Server": ["sql server", "mssql"],
+    "Oracle Database": ["oracle db", "oracle database"],
+    "MongoDB": ["mongo", "mongodb", "mongo db"],
+    "Redis": ["redis"],
+    "Cassandra": ["cassandra"],
+    "DynamoDB": ["dynamodb", "dynamo db"],
+    "Elasticsearch": ["elasticsearch", "elastic search", "elk"],
+    "Kafka": ["kafka", "apache kafka"],
+    "RabbitMQ": ["rabbitmq", "rabbit mq"],
+    "AWS": ["aws", "amazon web services"],
+    "Google Cloud Platform": ["gcp", "google cloud", "google cloud platform"],
+    "Microsoft Azure": ["azure", "microsoft azure"],
+    "Docker": ["docker", "dockerfile", "docker compose", "docker-compose"],
+    "Kubernetes": ["kubernetes", "k8s", "kube", "eks", "gke", "aks"],
+    "Terraform": ["terraform", "tf"],
+    "Ansible": ["ansible"],
+    "Jenkins": ["jenkins"],
+    "GitHub Actions": ["github actions", "gh actions"],
+    "CI/CD": ["ci/cd", "cicd", "ci cd", "continuous integration"],
+    "Git": ["git", "github", "gitlab", "bitbucket"],
+    "Linux": ["linux", "ubuntu", "debian", "centos"],
+    "Nginx": ["nginx"],
+    "Machine Learning": ["machine learning", "ml"],
+    "Deep Learning": ["deep learning", "dl"],
+    "TensorFlow": ["tensorflow", "tf2", "keras"],
+    "PyTorch": ["pytorch", "torch"],
+    "scikit-learn": ["scikit-learn", "sklearn", "scikit learn"],
+    "Pandas": ["pandas"],
+    "NumPy": ["numpy"],
+    "LangChain": ["langchain"],
+    "LangGraph": ["langgraph"],
+    "OpenAI API": ["openai", "openai api", "gpt", "chatgpt api"],
+    "Streamlit": ["streamlit"],
+    "Spark": ["spark", "pyspark", "apache spark"],
+    "Airflow": ["airflow", "apache airflow"],
+    "Selenium": ["selenium"],
+    "Jest": ["jest"],
+    "Pytest": ["pytest"],
+    "Figma": ["figma"],
+    "Flutter": ["flutter"],
+    "Dart": ["dart"],
+    "Android": ["android"],
+    "iOS": ["ios"],
+}
+
+# Words that carry no technology signal - anything else left over is sent to the LLM
+FILLER_WORDS = {
+    "i", "i've", "ive", "i'm", "im", "me", "my", "we", "our", "you", "a", "an", "the", "and", "or", "but", "with",
+    "of", "to", "in", "on", "at", "for", "from", "by", "as", "is", "are", "was", "were", "be", "been", "have",
+    "has", "had", "do", "did", "done", "also", "some", "little", "bit", "lot", "lots", "much", "many", "few",
+    "worked", "work", "working", "used", "use", "using", "know", "knowledge", "familiar", "experience",
+    "experienced", "years", "year", "months", "month", "built", "build", "building", "projects", "project",
+    "mostly", "mainly", "plus", "too", "very", "good", "basic", "basics", "advanced", "intermediate",
+    "beginner", "expert", "strong", "skills", "skill", "stack", "tech", "technologies", "tools", "frameworks",
+    "framework", "languages", "language", "like", "such", "etc", "things", "stuff", "other", "some", "all",
+    "both", "then", "currently", "learning", "learned", "comfortable", "professional", "personal", "side",
+    "development", "developer", "developing", "programming", "coding", "backend", "frontend", "full",
+    "fullstack", "web", "apps", "app", "applications", "application", "around", "about", "into", "via",
+    "time", "spent", "rest", "pipelines", "pipeline", "deployment", "deployments", "services", "service",
+    "databases", "database", "cloud", "data", "can", "just", "it", "that", "this", "them", "those", "these",
+    "recently", "previously", "before", "now", "company", "job", "role", "team", "my", "myself", "fairly",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./'-]*")
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds every alias occurrence in a single pass over the text."""
+
+    def __init__(self, patterns: dict):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern, value in patterns.items():
+            self._insert(pattern, value)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str, value: str) -> None:
+        node = 0
+        for ch in pattern:
+            if ch not in self.goto[node]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append([])
+                self.goto[node][ch] = len(self.goto) - 1
+            node = self.goto[node][ch]
+        self.output[node].append((len(pattern), value))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """All (start, end, value) matches, overlapping ones included."""
+        matches = []
+        node = 0
+        for position, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for length, value in self.output[node]:
+                matches.append((position - length + 1, position + 1, value))
+        return matches
+
+
+_matcher = AhoCorasick({alias: canonical for canonical, aliases in TECH_ALIASES.items() for alias in aliases})
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    # A trailing '.' is sentence punctuation, not part of a name like "node.js"
+    return not before.isalnum() and not (after.isalnum() or after in "+#")
+
+
+@lru_cache(maxsize=2048)
+def extract_local(text: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Return (canonical technologies, leftover non-filler tokens) for the text, using only the alias dictionary."""
+    lowered = text.lower()
+    matches = [m for m in _matcher.find_all(lowered) if _on_word_boundary(lowered, m[0], m[1])]
+    # Leftmost-longest, non-overlapping: "react native" wins over "react", "sql server" over "sql"
+    matches.sort(key=lambda m: (m[0], -(m[1] - m[0])))
+    found, covered, last_end = [], [], -1
+    for start, end, canonical in matches:
+        if start >= last_end:
+            covered.append((start, end))
+            last_end = end
+            if canonical not in found:
+                found.append(canonical)
+
+    remainder = list(lowered)
+    for start, end in covered:
+        remainder[start:end] = " " * (end - start)
+    leftovers = []
+    for token in _TOKEN_RE.findall("".join(remainder)):
+        token = token.strip("./-")
+        if token and not token.isdigit() and token not in FILLER_WORDS and token not in leftovers:
+            leftovers.append(token)
+    return tuple(sorted(found)), tuple(leftovers)
+
+
+def canonicalize(names: List[str]) -> List[str]:
+    """Map free-form technology names (e.g. from the LLM) onto canonical names where an alias is known."""
+    result = []
+    for name in names:
+        found, leftovers = extract_local(name)
+        canonical = found[0] if len(found) == 1 and not leftovers else name.strip()
+        if canonical and canonical not in result:
+            result.append(canonical)
+    return result
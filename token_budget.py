@@ -0,0 +1,84 @@
+import os
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:  # the character-based estimate is close enough for budgeting
+    tiktoken = None
+
+# Per-prompt budgets: the thread context and the candidate's latest answer are the only unbounded parts of a prompt
+THREAD_CONTEXT_TOKEN_BUDGET = int(os.getenv("THREAD_CONTEXT_TOKEN_BUDGET", "1200"))
+ANSWER_TOKEN_BUDGET = int(os.getenv("ANSWER_TOKEN_BUDGET", "600"))
+
+# Below this many tokens a clipped entry isn't worth including
+MIN_CLIP_TOKENS = 40
+
+_encoding = None
+_encoding_failed = False
+
+
+def _get_encoding():
+    """cl100k_base when tiktoken (and its vocabulary) is available, otherwise None - loaded once."""
+    global _encoding, _encoding_failed
+    if _encoding is None and tiktoken is not None and not _encoding_failed:
+        try:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"⚠️ tiktoken encoding unavailable, estimating tokens from characters: {e}")
+            _encoding_failed = True
+    return _encoding
+
+
+@lru_cache(maxsize=4096)
+def estimate_tokens(text: str) -> int:
+    """Token count for text - exact with tiktoken, otherwise ~4 characters per token (never fewer than words)."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max((len(text) + 3) // 4, len(text.split()))
+
+
+def clip(text: str, budget: int) -> str:
+    """Cut text to about budget tokens, keeping its head and tail (an answer's setup and its conclusion)."""
+    tokens = estimate_tokens(text)
+    if tokens <= budget:
+        return text
+    keep = int(budget * len(text) / tokens)
+    head = keep * 2 // 3
+    tail = keep - head
+    return f"{text[:head].rstrip()} [...] {text[len(text) - tail:].lstrip()}"
+
+
+def fit_lines(lines: List[str], budget: int = THREAD_CONTEXT_TOKEN_BUDGET, keep_head: int = 1, keep_tail: int = 2) -> str:
+    """Join lines within a token budget.
+
+    The first keep_head and last keep_tail lines are kept verbatim (clipped only if they alone exceed the budget).
+    The middle is filled newest-first; whatever doesn't fit is replaced by a one-line marker.
+    """
+    if sum(estimate_tokens(line) for line in lines) <= budget:
+        return "\n".join(lines)
+
+    head = lines[:keep_head]
+    tail = lines[max(keep_head, len(lines) - keep_tail):]
+    middle = lines[keep_head:max(keep_head, len(lines) - keep_tail)]
+    fixed = head + tail
+    if sum(estimate_tokens(line) for line in fixed) > budget:
+        share = budget // len(fixed)
+        head = [clip(line, share) for line in head]
+        tail = [clip(line, share) for line in tail]
+
+    remaining = budget - sum(estimate_tokens(line) for line in head + tail) - estimate_tokens("[... 99 earlier entries omitted ...]")
+    kept = []
+    for line in reversed(middle):
+        tokens = estimate_tokens(line)
+        if tokens <= remaining:
+            kept.insert(0, line)
+            remaining -= tokens
+            continue
+        if remaining >= MIN_CLIP_TOKENS:
+            kept.insert(0, clip(line, remaining))
+        break
+    omitted = len(middle) - len(kept)
+    marker = [f"[... {omitted} earlier entries omitted ...]"] if omitted else []
+    return "\n".join(head + marker + kept + tail)
@@ -0,0 +1,167 @@
+import os
+import threading
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, ExecutionTimeout, WTimeoutError
+
+# Write-behind: acknowledge chat turns before their transcript entries reach MongoDB
+TRANSCRIPT_WRITE_BEHIND = os.getenv("TRANSCRIPT_WRITE_BEHIND", "false").lower() == "true"
+FLUSH_INTERVAL_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_INTERVAL_SECONDS", "0.25"))
+FLUSH_BATCH_SIZE = int(os.getenv("TRANSCRIPT_FLUSH_BATCH_SIZE", "200"))
+# Flushes that fail on connection problems or timeouts are retried this many times before the entries are dropped
+MAX_FLUSH_RETRIES = int(os.getenv("TRANSCRIPT_MAX_FLUSH_RETRIES", "5"))
+# Worth retrying - anything else (validation failure, document too large, ...) fails the same way every time
+TRANSIENT_WRITE_ERRORS = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+
+class TranscriptFlushError(Exception):
+    """Raised by flush_candidate when the candidate's queued entries could not be written."""
+
+
+class TranscriptWriter:
+    """Appends chat_history entries either synchronously or in batched background bulk_writes."""
+
+    def __init__(self, write_behind: bool = TRANSCRIPT_WRITE_BEHIND):
+        self.write_behind = write_behind
+        self.collection = None
+        # candidate_id -> (ObjectId, [entries]) waiting to be written, in arrival order
+        self.pending = {}
+        self.pending_count = 0
+        # candidate_id -> failed flushes of its queued entries, for MAX_FLUSH_RETRIES
+        self.retries = {}
+        self.pending_lock = threading.Lock()
+        # Serializes writes so per-candidate order is kept and flush_candidate sees everything before it
+        self.write_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.worker = None
+
+    def bind(self, collection) -> None:
+        self.collection = collection
+
+    def start(self) -> None:
+        if self.write_behind and self.worker is None:
+            self.stopping.clear()
+            self.worker = threading.Thread(target=self._run, name="transcript-writer", daemon=True)
+            self.worker.start()
+            print(f"📝 Transcript write-behind enabled (flush every {FLUSH_INTERVAL_SECONDS}s)")
+
+    def stop(self) -> None:
+        """Stop the worker and flush whatever is still queued - called on shutdown."""
+        if self.worker is not None:
+            self.stopping.set()
+            self.wakeup.set()
+            self.worker.join(timeout=10)
+            self.worker = None
+        self.flush()
+
+    def append(self, candidate_id: str, obj_id, entry: dict) -> None:
+        """Record one transcript entry for the candidate."""
+        if not self.write_behind:
+            self.collection.update_one({"_id": obj_id}, {"$push": {"chat_history": entry}})
+            return
+        with self.pending_lock:
+            self.pending.setdefault(candidate_id, (obj_id, []))[1].append(entry)
+            self.pending_count += 1
+            if self.pending_count >= FLUSH_BATCH_SIZE:
+                self.wakeup.set()
+
+    def discard(self, candidate_id: str) -> None:
+        """Forget queued entries for a candidate whose document is being deleted."""
+        with self.pending_lock:
+            _, entries = self.pending.pop(candidate_id, (None, []))
+            self.pending_count -= len(entries)
+            self.retries.pop(candidate_id, None)
+
+    def flush_candidate(self, candidate_id: str) -> int:
+        """Write the candidate's queued entries now - gives read-your-writes before reading chat_history.
+
+        Returns how many entries were flushed, so callers that already read can tell whether to re-read.
+        Raises TranscriptFlushError if they could not be written (they are requeued or dropped as for background flushes).
+        """
+        if not self.write_behind:
+            return 0
+        with self.write_lock:
+            with self.pending_lock:
+                batch = {candidate_id: self.pending.pop(candidate_id)} if candidate_id in self.pending else {}
+                flushed = sum(len(entries) for _, entries in batch.values())
+                self.pending_count -= flushed
+            if candidate_id in self._write(batch):
+                raise TranscriptFlushError(f"Queued transcript entries for {candidate_id} could not be written")
+        return flushed
+
+    def flush(self) -> None:
+        """Write everything that is queued."""
+        with self.write_lock:
+            with self.pending_lock:
+                batch, self.pending = self.pending, {}
+                self.pending_count = 0
+            self._write(batch)
+
+    def _write(self, batch: dict) -> set:
+        """Write a batch; returns the candidate_ids whose entries did not make it (requeued or dropped)."""
+        if not batch:
+            return set()
+        operations = [
+            UpdateOne({"_id": obj_id}, {"$push": {"chat_history": {"$each": entries}}})
+            for obj_id, entries in batch.values()
+        ]
+        items = list(batch.items())
+        try:
+            self.collection.bulk_write(operations, ordered=True)
+        except BulkWriteError as e:
+            # Ordered bulk writes stop at the first error - everything before it was applied. A write error is
+            # permanent (validation, document too large, ...), so that candidate's entries are dropped; the
+            # operations after it never ran and go back in the queue as they were.
+            if not e.details.get("writeErrors"):
+                # Only a write concern error: every operation was applied, just not acknowledged as widely as asked -
+                # requeueing would $push the entries a second time
+                print(f"⚠️ Transcript flush applied without full write concern: {e.details.get('writeConcernErrors')}")
+                with self.pending_lock:
+                    for candidate_id in batch:
+                        self.retries.pop(candidate_id, None)
+                return set()
+            error = e.details["writeErrors"][0]
+            failed_at = error["index"]
+            (candidate_id, (_, entries)), rest = items[failed_at], items[failed_at + 1:]
+            print(f"❌ Transcript flush rejected for {candidate_id}, dropping {len(entries)} entries: {error.get('errmsg', e)}")
+            with self.pending_lock:
+                self.retries.pop(candidate_id, None)
+            self._requeue(rest, count_retry=False)
+            return {item_id for item_id, _ in items[failed_at:]}
+        except TRANSIENT_WRITE_ERRORS as e:
+            # $push is not idempotent, but an unknown outcome is better retried than lost
+            print(f"❌ Transcript flush failed, requeueing {len(items)} candidates: {e}")
+            self._requeue(items, count_retry=True)
+            return set(batch)
+        except Exception as e:
+            print(f"❌ Transcript flush failed permanently, dropping {sum(len(entries) for _, entries in batch.values())} entries: {e}")
+            with self.pending_lock:
+                for candidate_id in batch:
+                    self.retries.pop(candidate_id, None)
+            return set(batch)
+        with self.pending_lock:
+            for candidate_id in batch:
+                self.retries.pop(candidate_id, None)
+        return set()
+
+    def _requeue(self, items: list, count_retry: bool) -> None:
+        with self.pending_lock:
+            for candidate_id, (obj_id, entries) in items:
+                if count_retry:
+                    self.retries[candidate_id] = self.retries.get(candidate_id, 0) + 1
+                    if self.retries[candidate_id] > MAX_FLUSH_RETRIES:
+                        print(f"❌ Giving up on {len(entries)} transcript entries for {candidate_id} after {MAX_FLUSH_RETRIES} retries")
+                        self.retries.pop(candidate_id)
+                        continue
+                _, newer = self.pending.get(candidate_id, (obj_id, []))
+                self.pending[candidate_id] = (obj_id, entries + newer)
+                self.pending_count += len(entries)
+
+    def _run(self) -> None:
+        while not self.stopping.is_set():
+            self.wakeup.wait(FLUSH_INTERVAL_SECONDS)
+            self.wakeup.clear()
+            self.flush()
+
+
+transcript_writer = TranscriptWriter()